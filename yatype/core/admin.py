@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from posts import sharding
+from posts.models import ArchivedPost, Post
+
+CURSOR_VAR = 'cursor'
+
+
+def sharded(model):
+    return sharding.enabled() and model in sharding.SHARDED_MODELS
+
+
+def _estimated_count(model, database):
+    connection = connections[database]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    return model._default_manager.using(database).aggregate(
+        last=Max('pk'))['last'] or 0
+
+
+def estimated_count(model):
+    """Row count of the whole table from the planner statistics on
+    PostgreSQL, or from the highest primary key elsewhere, summed over the
+    post shards."""
+    if not sharded(model):
+        return _estimated_count(
+            model, router.db_for_read(model) or DEFAULT_DB_ALIAS)
+    counts = [
+        _estimated_count(model, database) for database in sharding.databases()]
+    if (model in (Post, ArchivedPost)
+            and connections[DEFAULT_DB_ALIAS].vendor != 'postgresql'):
+        # Post ids are handed out across the shards, SHARD_ID_STRIDE apart.
+        return max(counts) // sharding.SHARD_ID_STRIDE
+    return sum(counts)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Estimates the size of an unfiltered changelist and counts filtered
+    ones only up to ``ADMIN_COUNT_LIMIT`` rows."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return estimated_count(queryset.model)
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not sharded(queryset.model):
+            return queryset.values('pk')[:limit].count()
+        return min(limit, sum(
+            queryset.using(database).values('pk')[:limit].count()
+            for database in sharding.databases()))
+
+
+class KeysetChangeList(ChangeList):
+    """Pages through the default ``-pk`` ordering with a ``cursor`` (the
+    last primary key shown) instead of OFFSET, which has to skip all the
+    earlier rows. Sorting by a column falls back to numbered pages.
+
+    Models split across the post shards are always paged by ``-pk``, merging
+    the rows of every shard, and cannot be edited in the list.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        super().__init__(request, *args, **kwargs)
+        if sharded(self.model):
+            # The formset needs a single queryset.
+            self.list_editable = ()
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # A cursor only makes sense for the filters it was taken with.
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or ()), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    @cached_property
+    def keyset(self):
+        return sharded(self.model) or (
+            ORDER_VAR not in self.params
+            and list(self._get_default_ordering()) == ['-pk'])
+
+    def get_results(self, request):
+        self.cursor = self.next_cursor = None
+        if not self.keyset:
+            return super().get_results(request)
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        if CURSOR_VAR in self.params:
+            try:
+                self.cursor = int(self.params[CURSOR_VAR])
+            except ValueError:
+                raise IncorrectLookupParameters
+            queryset = queryset.filter(pk__lt=self.cursor)
+        # One row past the page tells whether there is a next one.
+        if sharded(self.model):
+            rows = sharding.first_rows(
+                queryset.order_by('-pk'), self.list_per_page + 1,
+                key=lambda row: row.pk)
+            result_list = rows[:self.list_per_page]
+        else:
+            rows = list(queryset[:self.list_per_page + 1])
+            result_list = queryset[:self.list_per_page]
+            # The list_editable formset needs a queryset; this one is
+            # served from the rows read above.
+            result_list._result_cache = rows[:self.list_per_page]
+        if len(rows) > self.list_per_page:
+            self.next_cursor = rows[self.list_per_page - 1].pk
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+
+    @property
+    def first_page_url(self):
+        return self.get_query_string(remove=[PAGE_VAR])
+
+    @property
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+
+class LargeTableAdminMixin:
+    """Changelist settings for tables too big to count or page with OFFSET:
+    estimated counts, keyset paging and no full result count."""
+
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    ordering = ('-pk',)
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
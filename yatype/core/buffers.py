@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+
+from django.db import connections
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Collects keyed values in process memory and hands them to ``flush``
+    in one batch once the buffer grows past ``max_size`` items or
+    ``interval`` seconds have passed since the previous flush.
+
+    A daemon thread flushes pending items every ``interval`` seconds, so an
+    idle worker does not hold them indefinitely; it exits once the buffer
+    is empty and the next ``add()`` starts it again.
+    """
+
+    def __init__(self, flush, merge=None, max_size=100, interval=30):
+        self._flush = flush
+        self._merge = merge or (lambda old, new: new)
+        self.max_size = max_size
+        self.interval = interval
+        self._items = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._items:
+                value = self._merge(self._items[key], value)
+            self._items[key] = value
+            due = (
+                len(self._items) >= self.max_size
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+            # A forked worker inherits the object but not the thread.
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Thread(
+                    target=self._flush_periodically, daemon=True,
+                    name='write-buffer-flush')
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(max(
+                self._last_flush + self.interval - time.monotonic(), 0))
+            with self._lock:
+                if not self._items:
+                    self._timer = None
+                    return
+                due = time.monotonic() - self._last_flush >= self.interval
+            if due:
+                try:
+                    self.flush()
+                finally:
+                    # The flush ran on this thread's own connections.
+                    connections.close_all()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._items.get(key, default)
+
+    def flush(self):
+        with self._lock:
+            items, self._items = self._items, {}
+            self._last_flush = time.monotonic()
+        if not items:
+            return 0
+        try:
+            self._flush(items)
+        except Exception:
+            # E.g. "database is locked": keep the batch for the next flush
+            # rather than losing it or failing the request that triggered it.
+            logger.exception('Could not flush %d buffered items', len(items))
+            metrics.incr('buffers.flush_errors')
+            with self._lock:
+                for key, value in items.items():
+                    if key in self._items:
+                        value = self._merge(value, self._items[key])
+                    self._items[key] = value
+            return 0
+        return len(items)
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,56 @@
+import gzip
+import zlib
+
+import brotli
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json',
+    'application/xml', 'application/rss+xml', 'application/atom+xml',
+    'image/svg+xml',
+)
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.xml', '.map', '.ico')
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(coding.strip().lower())
+    return [coding for coding in ('br', 'gzip') if coding in accepted]
+
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compress_static(data, coding):
+    """Slowest, smallest settings: static files are compressed only once."""
+    if coding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_stream(chunks, coding):
+    """Compresses an iterable of chunks, flushing after every chunk so each
+    one reaches the client as soon as it is produced."""
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(
+                zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
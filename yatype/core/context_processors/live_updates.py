@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def live_updates(request):
+    return {
+        'live_updates': settings.LIVE_UPDATES
+    }
@@ -0,0 +1,74 @@
+"""SQLite backend that reuses connections across requests.
+
+Django opens a connection per request and thread (with ``CONN_MAX_AGE = 0``)
+and SQLite pays for the file open, the function registrations and the
+pragmas every time. This backend hands out connections from a
+``core.db.pool.ConnectionPool`` per database instead, configured by the
+``POOL`` entry of the database settings::
+
+    'ENGINE': 'core.db.backends.sqlite3_pool',
+    'POOL': {
+        'MAX_SIZE': 8,          # connections open at most
+        'TIMEOUT': 10,          # seconds to wait for a free one
+        'MAX_LIFETIME': 600,    # seconds before a connection is reopened
+        'HEALTH_CHECK': True,   # SELECT 1 before reusing a connection
+        'PRAGMAS': {'journal_mode': 'wal'},  # run once per connection
+    },
+
+In-memory databases, the test database included, are not pooled.
+"""
+import threading
+
+from django.db.backends.sqlite3 import base
+
+from core.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias):
+    return _pools.get(alias)
+
+
+def close_pool(alias):
+    pool = _pools.pop(alias, None)
+    if pool is not None:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _pool(self, conn_params):
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+        options = self.settings_dict.get('POOL', {})
+        pragmas = options.get('PRAGMAS', {})
+
+        def connect():
+            connection = base.DatabaseWrapper.get_new_connection(
+                self, conn_params)
+            for name, value in pragmas.items():
+                connection.execute(f'PRAGMA {name} = {value}')
+            return connection
+
+        with _pools_lock:
+            return _pools.setdefault(self.alias, ConnectionPool(
+                self.alias, connect,
+                max_size=options.get('MAX_SIZE', 8),
+                timeout=options.get('TIMEOUT', 10),
+                max_lifetime=options.get('MAX_LIFETIME', 600),
+                health_check=options.get('HEALTH_CHECK', True)))
+
+    def get_new_connection(self, conn_params):
+        if self.is_in_memory_db():
+            return super().get_new_connection(conn_params)
+        self.connection_pool = self._pool(conn_params)
+        return self.connection_pool.acquire()
+
+    def _close(self):
+        if self.connection is None or self.is_in_memory_db():
+            return super()._close()
+        with self.wrap_database_errors:
+            self.connection_pool.release(self.connection)
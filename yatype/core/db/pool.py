@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+from core import metrics
+
+
+class ConnectionPool:
+    """Open DB-API connections shared by the threads of a worker.
+
+    At most ``max_size`` connections exist at a time; ``acquire()`` waits
+    up to ``timeout`` seconds for one to be released. Connections older
+    than ``max_lifetime`` seconds are closed instead of reused, and with
+    ``health_check`` an idle connection runs ``SELECT 1`` before it is
+    handed out again.
+    """
+
+    def __init__(self, name, connect, max_size=8, timeout=10,
+                 max_lifetime=600, health_check=True):
+        self.name = name
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _metric(self, name):
+        return f'db.pool.{self.name}.{name}'
+
+    def _expired(self, created):
+        return (self.max_lifetime is not None
+                and time.monotonic() - created >= self.max_lifetime)
+
+    def _healthy(self, connection, created):
+        if self._expired(created):
+            return False
+        if not self.health_check:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        metrics.incr(self._metric('discarded'))
+
+    def _checkout(self, deadline):
+        # The most recently released connection first: it is the warmest.
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.incr(self._metric('timeouts'))
+                    raise OperationalError(
+                        f'No connection of the {self.name} pool was released '
+                        f'within {self.timeout} seconds.')
+                self._condition.wait(remaining)
+            if self._idle:
+                return (*self._idle.pop(), False)
+            self._size += 1
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        metrics.incr(self._metric('created'))
+        return connection, time.monotonic(), True
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection, created, new = self._checkout(deadline)
+            if new or self._healthy(connection, created):
+                break
+            self._discard(connection)
+        if not new:
+            metrics.incr(self._metric('reused'))
+        with self._condition:
+            self._in_use[connection] = created
+        metrics.observe(
+            self._metric('wait_ms'), (time.monotonic() - started) * 1000)
+        return connection
+
+    def release(self, connection):
+        """Takes back a connection from ``acquire()``, rolling back what
+        its last user left uncommitted."""
+        with self._condition:
+            created = self._in_use.pop(connection)
+        try:
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        if self._closed or self._expired(created):
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, created))
+            self._condition.notify()
+
+    def close(self):
+        """Closes the idle connections, and the ones in use once they are
+        released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+            }
@@ -0,0 +1,296 @@
+import http.client
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model)
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import OperationalError
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.sharding import first_rows
+
+User = get_user_model()
+USERNAME_PREFIX = 'loadtest-'
+DEFAULT_WEIGHTS = {
+    'index': 40,
+    'group': 20,
+    'follow': 20,
+    'post': 5,
+    'comment': 15,
+}
+
+
+def parse_weights(value):
+    """``'index=5,post=1'`` -> ``{'index': 5, 'post': 1}``."""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f'Unknown scenario "{name}".')
+        weights[name] = int(weight)
+    return weights
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer:
+    """Serves the WSGI application from a thread on a free local port."""
+
+    def __init__(self, application):
+        self.server = ThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler)
+        self.server.set_app(application)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LockCounter:
+    """Counts "database is locked" errors on every new SQLite connection
+    of this process."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if 'locked' in str(error):
+                with self._lock:
+                    self.count += 1
+            raise
+
+    def install(self, sender, connection, **kwargs):
+        if connection.vendor == 'sqlite':
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def add(self, scenario, status, latency):
+        with self._lock:
+            self.latencies[scenario].append(latency)
+            self.statuses[scenario][status] += 1
+
+
+class VirtualUser:
+    """One client with its own cookies; requests never follow redirects."""
+
+    def __init__(self, base_url, recorder, session_key=None):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port
+        self.recorder = recorder
+        self.cookies = {}
+        if session_key:
+            self.cookies[settings.SESSION_COOKIE_NAME] = session_key
+
+    def request(self, scenario, method, path, data=None):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-CSRFToken'] = self.cookies.get(
+                settings.CSRF_COOKIE_NAME, '')
+        connection = http.client.HTTPConnection(
+            self.host, self.port, timeout=30)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            response, status = None, 'connection error'
+        finally:
+            connection.close()
+        self.recorder.add(scenario, status, time.perf_counter() - started)
+        if response is not None:
+            for header in response.headers.get_all('Set-Cookie') or ():
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+        return status
+
+
+class Scenarios:
+    """The user journeys, picked at random by weight on every iteration."""
+
+    def __init__(self, groups, posts):
+        self.groups = groups
+        self.posts = posts
+
+    def index(self, anonymous, user):
+        anonymous.request(
+            'index', 'GET', f'{reverse("posts:index")}'
+                            f'?page={random.randint(1, 5)}')
+
+    def group(self, anonymous, user):
+        if self.groups:
+            anonymous.request('group', 'GET', reverse(
+                'posts:group_list',
+                kwargs={'slug': random.choice(self.groups)}))
+
+    def follow(self, anonymous, user):
+        user.request('follow', 'GET', reverse('posts:follow_index'))
+
+    def post(self, anonymous, user):
+        url = reverse('posts:post_create')
+        user.request('post', 'GET', url)
+        user.request('post', 'POST', url, {'text': 'Load test post'})
+
+    def comment(self, anonymous, user):
+        if not self.posts:
+            return
+        post_id = random.choice(self.posts)
+        user.request('comment', 'GET', reverse(
+            'posts:post_detail', kwargs={'post_id': post_id}))
+        user.request('comment', 'POST', reverse(
+            'posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': 'Load test comment'})
+
+
+def create_users(count):
+    """Creates logged-in virtual users, each following a few authors, and
+    returns their session keys."""
+    authors = list(
+        User.objects.exclude(username__startswith=USERNAME_PREFIX)
+        .values_list('pk', flat=True)[:50])
+    session_keys = []
+    for number in range(count):
+        user, _ = User.objects.get_or_create(
+            username=f'{USERNAME_PREFIX}{number}')
+        for author_id in random.sample(authors, min(len(authors), 5)):
+            user.follower.get_or_create(author_id=author_id)
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        session_keys.append(session.session_key)
+    return session_keys
+
+
+def delete_users():
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+def run(base_url, concurrency, duration, weights):
+    session_keys = create_users(concurrency)
+    scenarios = Scenarios(
+        list(Group.objects.values_list('slug', flat=True)[:50]),
+        first_rows(
+            Post.objects.order_by('-pk').values_list('pk', flat=True), 200),
+    )
+    names = [name for name, weight in weights.items() if weight > 0]
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    def worker(session_key):
+        anonymous = VirtualUser(base_url, recorder)
+        user = VirtualUser(base_url, recorder, session_key)
+        while time.monotonic() < deadline:
+            name = random.choices(
+                names, weights=[weights[name] for name in names])[0]
+            getattr(scenarios, name)(anonymous, user)
+
+    threads = [
+        threading.Thread(target=worker, args=(session_key,))
+        for session_key in session_keys
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def summarize(recorder, elapsed):
+    """Requests per second, latency percentiles (ms) and error rates,
+    overall and per scenario. 429 and 503 count as shed, not as errors."""
+
+    def stats(latencies, statuses):
+        total = sum(statuses.values())
+        errors = sum(
+            count for status, count in statuses.items()
+            if status not in (429, 503) and (
+                not isinstance(status, int) or status >= 400))
+        shed = statuses[429] + statuses[503]
+        return {
+            'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0,
+            'p50_ms': _ms(percentile(latencies, 0.5)),
+            'p90_ms': _ms(percentile(latencies, 0.9)),
+            'p99_ms': _ms(percentile(latencies, 0.99)),
+            'max_ms': _ms(max(latencies) if latencies else None),
+            'error_rate': round(errors / total, 4) if total else 0,
+            'shed_rate': round(shed / total, 4) if total else 0,
+            'statuses': {
+                str(status): count for status, count in statuses.items()},
+        }
+
+    all_latencies = [
+        latency for latencies in recorder.latencies.values()
+        for latency in latencies]
+    all_statuses = Counter()
+    for statuses in recorder.statuses.values():
+        all_statuses.update(statuses)
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'total': stats(all_latencies, all_statuses),
+        'scenarios': {
+            name: stats(recorder.latencies[name], recorder.statuses[name])
+            for name in sorted(recorder.latencies)
+        },
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core import metrics
+from core.db.backends.sqlite3_pool.base import close_pool
+from core.loadtest import percentile
+from posts.models import Post, User
+
+ENGINES = {
+    'sqlite3': 'django.db.backends.sqlite3',
+    'sqlite3_pool': 'core.db.backends.sqlite3_pool',
+}
+
+
+def fake_request(alias):
+    """The queries of a small page, then the connection close Django does
+    when the request finishes."""
+    list(Post.objects.using(alias).select_related('author', 'group')[:10])
+    User.objects.using(alias).filter(is_active=True).exists()
+    connections[alias].close()
+
+
+class Command(BaseCommand):
+    help = ('Runs the same queries from several threads, closing the '
+            'connection after each simulated request, with the plain SQLite '
+            'backend and with core.db.backends.sqlite3_pool, and compares '
+            'latency, connections opened and the wait for a pooled one.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per thread.')
+        parser.add_argument(
+            '--pool-size', type=int,
+            help='MAX_SIZE of the pool, the number of threads by default.')
+
+    def handle(self, *args, **options):
+        default = connections.databases['default']
+        if 'sqlite' not in default['ENGINE'] or \
+                connections['default'].is_in_memory_db():
+            raise CommandError('Needs a SQLite database file as default.')
+        pool = dict(default.get('POOL', {}),
+                    MAX_SIZE=options['pool_size'] or options['threads'])
+        self.stdout.write(
+            f'{"backend":<14}{"rps":>9}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"opened":>8}{"wait avg":>10}{"wait max":>10}')
+        for name, engine in ENGINES.items():
+            alias = f'bench_{name}'
+            connections.databases[alias] = dict(
+                default, ENGINE=engine, POOL=pool)
+            try:
+                row = self.run(alias, options['threads'], options['requests'])
+            finally:
+                close_pool(alias)
+                del connections.databases[alias]
+            snapshot = metrics.snapshot()
+            wait = snapshot['timings'].get(f'db.pool.{alias}.wait_ms', {})
+            # Without a pool every connect opens the database file.
+            opened = snapshot['counters'].get(
+                f'db.pool.{alias}.created', row['connects'])
+            self.stdout.write(
+                f'{name:<14}{row["rps"]:>9.1f}{row["p50_ms"]:>9.2f}'
+                f'{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}'
+                f'{opened:>8}{wait.get("avg", 0):>10.3f}'
+                f'{wait.get("max", 0):>10.3f}')
+
+    def run(self, alias, threads, requests):
+        latencies, connects = [], []
+        lock = threading.Lock()
+
+        def count_connects(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    connects.append(1)
+
+        def worker():
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                fake_request(alias)
+                timings.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(timings)
+
+        connection_created.connect(count_connects)
+        started = time.perf_counter()
+        try:
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            connection_created.disconnect(count_connects)
+        elapsed = time.perf_counter() - started
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'connects': len(connects),
+        }
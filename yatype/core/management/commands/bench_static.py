@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.views import static
+
+from core.media import serve_static
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def body_size(response):
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    response.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = ('Compares bytes sent and time per request of django.views.static '
+            'and core.media.serve_static for collected static files.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            default=['css/bootstrap.min.css', 'img/logo.png'])
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(settings.STATIC_ROOT):
+            raise CommandError('Run `manage.py collectstatic` first.')
+        factory = RequestFactory()
+        handlers = {
+            'static.serve': lambda request, path: static.serve(
+                request, path, document_root=settings.STATIC_ROOT),
+            'serve_static': serve_static,
+        }
+        self.stdout.write(
+            f'{"file":<28}{"encoding":<10}{"view":<14}'
+            f'{"bytes":>10}{"ms/request":>12}')
+        for path in options['paths']:
+            for encoding in ENCODINGS:
+                request = factory.get(
+                    f'/static/{path}', HTTP_ACCEPT_ENCODING=encoding)
+                for name, handler in handlers.items():
+                    size = body_size(handler(request, path))
+                    started = time.perf_counter()
+                    for _ in range(options['requests']):
+                        body_size(handler(request, path))
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{path:<28}{encoding:<10}{name:<14}{size:>10}'
+                        f'{elapsed * 1000 / options["requests"]:>12.3f}')
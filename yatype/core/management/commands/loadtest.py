@@ -0,0 +1,91 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import (
+    DEFAULT_WEIGHTS, LocalServer, LockCounter, delete_users, parse_weights,
+    run, summarize)
+
+
+class Command(BaseCommand):
+    help = ('Runs weighted browsing, posting and commenting scenarios '
+            'against yatype.wsgi.application on a local threaded server '
+            '(or --url) and reports throughput, latency and errors. '
+            'Creates loadtest-N users, so use a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument(
+            '--weights', type=parse_weights, default=DEFAULT_WEIGHTS,
+            help='For example "index=40,group=20,follow=20,post=5,comment=15"')
+        parser.add_argument(
+            '--url', help='Load an already running server instead.')
+        parser.add_argument('--output', help='JSON results file.')
+        parser.add_argument(
+            '--compare', help='Results file of a previous run to compare to.')
+        parser.add_argument(
+            '--keep-users', action='store_true',
+            help='Do not delete the loadtest-N users and their posts.')
+
+    def handle(self, *args, **options):
+        weights = dict(DEFAULT_WEIGHTS, **options['weights'])
+        previous = None
+        if options['compare']:
+            if not os.path.isfile(options['compare']):
+                raise CommandError(f'No results at {options["compare"]}.')
+            with open(options['compare']) as results:
+                previous = json.load(results)
+        try:
+            if options['url']:
+                recorder, elapsed = run(
+                    options['url'], options['concurrency'],
+                    options['duration'], weights)
+                lock_errors = None
+            else:
+                from yatype.wsgi import application
+
+                with LockCounter() as locks:
+                    with LocalServer(application) as server:
+                        recorder, elapsed = run(
+                            server.url, options['concurrency'],
+                            options['duration'], weights)
+                lock_errors = locks.count
+        finally:
+            if not options['keep_users']:
+                delete_users()
+
+        results = summarize(recorder, elapsed)
+        results.update({
+            'concurrency': options['concurrency'],
+            'weights': weights,
+            'sqlite_lock_errors': lock_errors,
+        })
+        self._print(results, previous)
+        output = options['output'] or f'loadtest-{int(time.time())}.json'
+        with open(output, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+        self.stdout.write(f'Results saved to {output}')
+
+    def _print(self, results, previous):
+        self.stdout.write(
+            f'{"scenario":<10}{"requests":>9}{"rps":>9}{"p50":>9}{"p90":>9}'
+            f'{"p99":>9}{"errors":>9}{"shed":>8}')
+        rows = dict(results['scenarios'], total=results['total'])
+        for name, row in rows.items():
+            self.stdout.write(
+                f'{name:<10}{row["requests"]:>9}{row["rps"]:>9.1f}'
+                f'{row["p50_ms"] or 0:>9.1f}{row["p90_ms"] or 0:>9.1f}'
+                f'{row["p99_ms"] or 0:>9.1f}{row["error_rate"]:>9.2%}'
+                f'{row["shed_rate"]:>8.2%}')
+        self.stdout.write(
+            f'SQLite lock errors: {results["sqlite_lock_errors"]}')
+        if previous:
+            for key in ('rps', 'p50_ms', 'p99_ms', 'error_rate'):
+                before = previous['total'][key] or 0
+                after = results['total'][key] or 0
+                change = (after - before) / before if before else 0
+                self.stdout.write(
+                    f'{key}: {before} -> {after} ({change:+.1%})')
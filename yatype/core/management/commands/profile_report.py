@@ -0,0 +1,83 @@
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import categorize, make_token, read_collapsed
+
+
+class Command(BaseCommand):
+    help = ('Merges the request profiles written by ProfilingMiddleware into '
+            'one collapsed-stack file (for flamegraph.pl or speedscope) and '
+            'one pstats file per view.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'views', nargs='*',
+            help='View names to merge, all profiled views by default.')
+        parser.add_argument(
+            '--output', help='Report directory, PROFILING_DIR/report by '
+                             'default.')
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Print a signed token that turns on profiling for a '
+                 'request, then exit.')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_token())
+            return
+        root = settings.PROFILING_DIR
+        if not os.path.isdir(root):
+            raise CommandError(f'No profiles in {root}.')
+        output = options['output'] or os.path.join(root, 'report')
+        os.makedirs(output, exist_ok=True)
+        views = options['views'] or sorted(
+            name for name in os.listdir(root)
+            if name != 'report' and os.path.isdir(os.path.join(root, name)))
+        for view in views:
+            directory = os.path.join(root, view)
+            if not os.path.isdir(directory):
+                raise CommandError(f'No profiles for "{view}".')
+            names = sorted(os.listdir(directory))
+            self.stdout.write(self.style.MIGRATE_HEADING(view))
+            collapsed = [name for name in names if name.endswith('.collapsed')]
+            if collapsed:
+                self._merge_collapsed(directory, collapsed, output, view,
+                                      options['limit'])
+            profiles = [name for name in names if name.endswith('.pstats')]
+            if profiles:
+                self._merge_pstats(directory, profiles, output, view,
+                                   options['limit'])
+
+    def _merge_collapsed(self, directory, names, output, view, limit):
+        stacks = Counter()
+        for name in names:
+            stacks.update(read_collapsed(os.path.join(directory, name)))
+        path = os.path.join(output, f'{view}.collapsed')
+        with open(path, 'w') as report:
+            for stack, count in stacks.most_common():
+                report.write(f'{stack} {count}\n')
+        total = sum(stacks.values())
+        self.stdout.write(
+            f'  {len(names)} sampled requests, {total} samples -> {path}')
+        for category, count in categorize(stacks).most_common():
+            self.stdout.write(
+                f'  {category:<12}{count * 100 / (total or 1):>6.1f}%')
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        for frame, count in leaves.most_common(limit):
+            self.stdout.write(f'  {count:>8}  {frame}')
+
+    def _merge_pstats(self, directory, names, output, view, limit):
+        stats = pstats.Stats(
+            *(os.path.join(directory, name) for name in names),
+            stream=self.stdout)
+        path = os.path.join(output, f'{view}.pstats')
+        stats.dump_stats(path)
+        self.stdout.write(f'  {len(names)} cProfile runs -> {path}')
+        stats.sort_stats('cumulative').print_stats(limit)
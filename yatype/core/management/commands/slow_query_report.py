@@ -0,0 +1,63 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.querylog import fingerprint
+
+
+class Command(BaseCommand):
+    help = ('Groups the slow query log by statement fingerprint and lists '
+            'the statements that cost the most time in total.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--flagged', action='store_true',
+            help='Only statements with a full scan or a temp B-tree sort.')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        if not path or not os.path.isfile(path):
+            raise CommandError(f'No slow query log at {path}.')
+        groups = {}
+        with open(path) as log:
+            for line in log:
+                entry = json.loads(line)
+                key, statement = fingerprint(entry['sql'])
+                group = groups.setdefault(key, {
+                    'statement': statement,
+                    'count': 0,
+                    'total_ms': 0,
+                    'max_ms': 0,
+                    'views': set(),
+                    'flags': set(),
+                    'plan': entry['plan'],
+                    'stack': entry['stack'],
+                })
+                group['count'] += 1
+                group['total_ms'] += entry['duration_ms']
+                group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+                group['views'].add(entry['view'] or '-')
+                group['flags'].update(entry['flags'])
+
+        report = sorted(
+            (group for group in groups.values()
+             if group['flags'] or not options['flagged']),
+            key=lambda group: group['total_ms'], reverse=True)
+        for group in report[:options['limit']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{group["total_ms"]:.0f} ms total, {group["count"]} calls, '
+                f'avg {group["total_ms"] / group["count"]:.1f} ms, '
+                f'max {group["max_ms"]:.1f} ms'))
+            self.stdout.write(f'  views: {", ".join(sorted(group["views"]))}')
+            if group['flags']:
+                self.stdout.write(self.style.WARNING(
+                    f'  flags: {", ".join(sorted(group["flags"]))}'))
+            self.stdout.write(f'  {group["statement"]}')
+            for detail in group['plan']:
+                self.stdout.write(f'    plan: {detail}')
+            for frame in group['stack']:
+                self.stdout.write(f'    at {frame}')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = ('Compiles templates, imports views, opens database connections '
+            'and pre-renders the busiest pages into the cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARMUP_INDEX_PAGES)
+        parser.add_argument(
+            '--groups', type=int, default=settings.WARMUP_GROUPS)
+        parser.add_argument(
+            '--profiles', type=int, default=settings.WARMUP_PROFILES)
+
+    def handle(self, *args, **options):
+        timings = warm_up(
+            options['pages'], options['groups'], options['profiles'])
+        for name, count, seconds in timings:
+            if count is None:
+                self.stdout.write(self.style.ERROR(
+                    f'{name:<12} failed after {seconds * 1000:.1f} ms'))
+            else:
+                self.stdout.write(
+                    f'{name:<12} {count:>5} in {seconds * 1000:.1f} ms')
+        total = sum(seconds for _, _, seconds in timings)
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed up in {total * 1000:.1f} ms'))
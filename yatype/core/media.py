@@ -0,0 +1,167 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepted_encodings
+from .storage import ENCODING_SUFFIXES
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+ARCHIVE_TYPES = {'gzip': 'application/gzip', 'bzip2': 'application/x-bzip2'}
+
+
+class RangeFile:
+    """Exposes ``length`` bytes of ``file`` starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(start, end)`` of a single byte range, ``False`` when it starts past
+    the end of the file, and ``None`` for a header this server does not
+    serve (several ranges, other units), which is ignored."""
+    match = RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        if end and int(end) < start:
+            return None
+        end = min(int(end) if end else size - 1, size - 1)
+    else:
+        start, end = max(size - int(end), 0), size - 1
+    if start > end:
+        return False
+    return start, end
+
+
+def cache_control(max_age):
+    if not max_age:
+        return 'no-cache'
+    control = f'public, max-age={max_age}'
+    if max_age >= 365 * 24 * 3600:
+        control += ', immutable'
+    return control
+
+
+def guess_content_type(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    if encoding:
+        # Compressed files such as sitemap.xml.gz are sent as they are.
+        content_type = ARCHIVE_TYPES.get(encoding)
+    return content_type or 'application/octet-stream'
+
+
+def serve_file(request, path, document_root, max_age, precompressed=False):
+    """Serves a file from ``document_root`` the way a front web server would:
+    conditional GET, byte ranges and precompressed ``.br``/``.gz`` siblings.
+
+    With ``FILE_OFFLOAD_HEADER`` set, only the headers are produced and the
+    body is left to the web server (X-Sendfile or X-Accel-Redirect).
+    Otherwise the file object is handed to the WSGI server, which can send
+    it with ``wsgi.file_wrapper`` (sendfile) instead of reading it in Python.
+    """
+    full_path = safe_join(document_root, path)
+    if not os.path.isfile(full_path):
+        raise Http404(f'"{path}" does not exist')
+    stat_result = os.stat(full_path)
+    content_type = guess_content_type(full_path)
+    etag = f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+    coding = None
+    if precompressed:
+        for accepted in accepted_encodings(request):
+            if os.path.isfile(full_path + ENCODING_SUFFIXES[accepted]):
+                coding = accepted
+                full_path += ENCODING_SUFFIXES[accepted]
+                etag = f'{etag[:-1]}-{accepted}"'
+                break
+
+    if (request.META.get('HTTP_IF_NONE_MATCH') == etag
+            or not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                stat_result.st_mtime, stat_result.st_size)):
+        response = HttpResponseNotModified()
+    elif settings.FILE_OFFLOAD_HEADER == 'X-Accel-Redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.FILE_OFFLOAD_PREFIX + request.path
+            + (ENCODING_SUFFIXES[coding] if coding else ''))
+    elif settings.FILE_OFFLOAD_HEADER == 'X-Sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = _file_response(request, full_path, content_type, etag)
+
+    if coding:
+        response['Content-Encoding'] = coding
+    if precompressed:
+        response['Vary'] = 'Accept-Encoding'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat_result.st_mtime)
+    response['Cache-Control'] = cache_control(max_age)
+    return response
+
+
+def _file_response(request, full_path, content_type, etag):
+    size = os.path.getsize(full_path)
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        byte_range = parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_media(request, path):
+    return serve_file(
+        request, path, settings.MEDIA_ROOT, settings.MEDIA_CACHE_MAX_AGE)
+
+
+def serve_static(request, path):
+    max_age = (
+        settings.STATIC_CACHE_MAX_AGE if HASHED_NAME_RE.search(path) else 0)
+    return serve_file(
+        request, path, settings.STATIC_ROOT, max_age, precompressed=True)
+
+
+def serve_sitemap(request, name='sitemap.xml'):
+    return serve_file(
+        request, name, settings.SITEMAP_ROOT, settings.SITEMAP_MAX_AGE)
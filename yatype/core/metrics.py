@@ -0,0 +1,37 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, value):
+    with _lock:
+        count, total, peak = _timings.get(name, (0, 0, 0))
+        _timings[name] = (count + 1, total + value, max(peak, value))
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings = dict(_timings)
+    return {
+        'counters': counters,
+        'timings': {
+            name: {'count': count, 'total': total, 'max': peak,
+                   'avg': total / count}
+            for name, (count, total, peak) in timings.items()
+        },
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,153 @@
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import decorator_from_middleware
+from django.utils.deprecation import MiddlewareMixin
+from django.views.decorators.cache import cache_page
+
+from . import metrics
+from .compression import (
+    COMPRESSIBLE_TYPES, accepted_encodings, compress, compress_stream)
+from .profiling import Profile, should_profile
+from .querylog import QueryTracer
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresses text responses with brotli or gzip, whichever the client
+    prefers, and records ratio and CPU time per view.
+
+    Responses that already carry a Content-Encoding are left alone, so
+    pages stored compressed by ``compress_page`` under ``cache_page`` are
+    never compressed twice. So are byte ranges, whose Content-Range counts
+    bytes of the uncompressed file.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if (response.has_header('Content-Encoding')
+                or response.status_code == 206
+                or response.has_header('Content-Range')
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith('text/event-stream')):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codings = accepted_encodings(request)
+        if not codings:
+            return response
+        coding = codings[0]
+        name = view_name(request)
+
+        if response.streaming:
+            response.streaming_content = self._compress_stream(
+                response.streaming_content, coding, name)
+            # Do not let the WSGI server send the raw file instead.
+            response.file_to_stream = None
+            del response['Content-Length']
+        else:
+            started = time.process_time()
+            compressed = compress(response.content, coding)
+            self._record(
+                name, len(response.content), len(compressed), started)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+    def _compress_stream(self, chunks, coding, name):
+        sizes = {'original': 0, 'compressed': 0}
+
+        def counted(chunks):
+            for chunk in chunks:
+                sizes['original'] += len(chunk)
+                yield chunk
+
+        started = time.process_time()
+        for data in compress_stream(counted(chunks), coding):
+            sizes['compressed'] += len(data)
+            yield data
+        self._record(name, sizes['original'], sizes['compressed'], started)
+
+    @staticmethod
+    def _record(name, original, compressed, started):
+        metrics.observe(
+            f'compression.cpu_ms.{name}',
+            (time.process_time() - started) * 1000)
+        if original:
+            metrics.observe(f'compression.ratio.{name}', compressed / original)
+
+
+compress_page = decorator_from_middleware(CompressionMiddleware)
+
+
+def anonymous_cache_page(timeout, key_prefix=None):
+    """``cache_page`` for anonymous visitors only. Signed-in users get
+    pages with their own state, such as the reactions they just toggled,
+    that a cached copy would hide."""
+    def decorator(view):
+        cached_view = cache_page(timeout, key_prefix=key_prefix)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry a signed token (``X-Profile`` header or
+    ``_profile`` parameter, see ``manage.py profile_report --token``) and a
+    random ``PROFILING_SAMPLE_RATE`` share of all other requests.
+
+    Profiles are written per view name under ``PROFILING_DIR``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+        with Profile(settings.PROFILING_MODE) as profile:
+            response = self.get_response(request)
+        profile.save(view_name(request))
+        return response
+
+
+class SlowQueryMiddleware:
+    """Traces the queries of every request on all database connections and
+    logs the slow ones with the view that ran them (see ``core.querylog``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            return self.get_response(request)
+        tracer = QueryTracer(lambda: view_name(request))
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(tracer))
+            return self.get_response(request)
@@ -0,0 +1,166 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.profiling'
+TOKEN_HEADER = 'HTTP_X_PROFILE'
+TOKEN_PARAM = '_profile'
+# Where the time of a request can go, matched against the frame labels.
+CATEGORIES = (
+    ('orm', ('django/db/',)),
+    ('templates', ('django/template/', 'templatetags/')),
+    ('sorl', ('sorl/',)),
+)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = (request.META.get(TOKEN_HEADER)
+             or request.GET.get(TOKEN_PARAM))
+    if token:
+        return valid_token(token)
+    rate = settings.PROFILING_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+def frame_label(code):
+    path = code.co_filename
+    for prefix in ('site-packages/', 'lib/python'):
+        if prefix in path:
+            path = path.split(prefix, 1)[1]
+            break
+    else:
+        path = os.path.relpath(path, settings.BASE_DIR)
+    # ';' separates frames in the collapsed format.
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'.replace(';', ',')
+
+
+class StackSampler:
+    """Records the stack of one thread every ``interval`` seconds from a
+    background thread, so the profiled code itself runs at full speed."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class Profile:
+    """Profiles the current thread with the configured ``PROFILING_MODE``:
+    'sampler' writes collapsed stacks, 'cprofile' writes pstats."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        if mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+        else:
+            self._profiler = StackSampler(
+                threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+
+    def save(self, name):
+        directory = os.path.join(
+            settings.PROFILING_DIR, re.sub(r'[^\w.-]', '_', name))
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(
+            directory, f'{time.time_ns()}-{os.getpid()}')
+        if self.mode == 'cprofile':
+            self._profiler.dump_stats(stem + '.pstats')
+        else:
+            write_collapsed(stem + '.collapsed', self._profiler.stacks)
+        rotate(directory, settings.PROFILING_KEEP)
+
+
+def write_collapsed(path, stacks):
+    with open(path, 'w') as output:
+        for stack, count in stacks.most_common():
+            output.write(f'{stack} {count}\n')
+
+
+def read_collapsed(path):
+    stacks = Counter()
+    with open(path) as collapsed:
+        for line in collapsed:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def rotate(directory, keep):
+    """Deletes all but the newest ``keep`` profiles in ``directory``."""
+    names = sorted(
+        (name for name in os.listdir(directory)
+         if name.endswith(('.collapsed', '.pstats'))),
+        key=lambda name: int(name.split('-', 1)[0]),
+        reverse=True)
+    for name in names[keep:]:
+        os.remove(os.path.join(directory, name))
+
+
+def categorize(stacks):
+    """Splits the samples between ORM, templates, sorl and everything
+    else, by the innermost category found on each stack."""
+    totals = Counter()
+    for stack, count in stacks.items():
+        category = None
+        for frame in reversed(stack.split(';')):
+            category = next((
+                name for name, paths in CATEGORIES
+                if any(path in frame for path in paths)), None)
+            if category:
+                break
+        totals[category or 'other'] += count
+    return totals
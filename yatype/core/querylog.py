@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_write_lock = threading.Lock()
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalises ``sql`` so the same query with different parameters, or
+    an ``IN`` list of a different length, maps to the same statement."""
+    normalized = LITERAL_RE.sub('?', sql)
+    normalized = normalized.replace('%s', '?')
+    normalized = IN_LIST_RE.sub('IN (...)', normalized)
+    normalized = SPACE_RE.sub(' ', normalized).strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:12], normalized
+
+
+def plan_flags(plan):
+    flags = set()
+    for detail in plan:
+        if re.match(r'SCAN (TABLE )?\w+$', detail):
+            flags.add('full_scan')
+        if 'USE TEMP B-TREE' in detail:
+            flags.add('temp_btree')
+    return sorted(flags)
+
+
+def call_site(limit):
+    """The innermost project frames of the current stack."""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.startswith(__file__[:-3])
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:'
+        f'{frame.lineno} in {frame.name}'
+        for frame in frames[-limit:]
+    ]
+
+
+class QueryTracer:
+    """A ``connection.execute_wrapper`` that records every query slower
+    than ``SLOW_QUERY_THRESHOLD_MS`` together with the view, the call site
+    and, for SQLite SELECTs, the ``EXPLAIN QUERY PLAN`` output."""
+
+    def __init__(self, view_name=lambda: None):
+        self.view_name = view_name
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.record(sql, params, many, context, duration)
+
+    def explain(self, connection, sql, params):
+        if (connection.vendor != 'sqlite'
+                or not sql.lstrip().upper().startswith('SELECT')):
+            return []
+        self._local.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                return [row[-1] for row in cursor.fetchall()]
+        except Exception:
+            logger.exception('Could not explain a slow query')
+            return []
+        finally:
+            self._local.explaining = False
+
+    def record(self, sql, params, many, context, duration):
+        plan = [] if many else self.explain(context['connection'], sql, params)
+        key, _ = fingerprint(sql)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'view': self.view_name(),
+            'duration_ms': round(duration, 3),
+            'fingerprint': key,
+            'sql': sql,
+            'params': [str(param) for param in params or ()] if not many
+            else [],
+            'stack': call_site(settings.SLOW_QUERY_STACK_DEPTH),
+            'plan': plan,
+            'flags': plan_flags(plan),
+        }
+        logger.warning(
+            'Slow query (%.1f ms) in %s: %s %s', duration, entry['view'],
+            sql, entry['flags'])
+        if settings.SLOW_QUERY_LOG:
+            with _write_lock, open(settings.SLOW_QUERY_LOG, 'a') as log:
+                log.write(json.dumps(entry) + '\n')
@@ -0,0 +1,75 @@
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .views import service_unavailable, too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_write_slots = threading.BoundedSemaphore(
+    settings.RATELIMIT_MAX_CONCURRENT_WRITES)
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def take_token(key, rate):
+    """Token bucket kept in the cache as ``(tokens, updated_at)``.
+
+    Returns ``0`` when a token was taken, otherwise the number of seconds
+    until the next one becomes available.
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time()
+    tokens, updated_at = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated_at) * capacity / period)
+    if tokens < 1:
+        cache.set(key, (tokens, now), period)
+        return (1 - tokens) * period / capacity
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def client_keys(request, scope):
+    keys = [f'ratelimit:{scope}:ip:{request.META.get("REMOTE_ADDR")}']
+    if request.user.is_authenticated:
+        keys.append(f'ratelimit:{scope}:user:{request.user.pk}')
+    return keys
+
+
+def ratelimit(rate, methods=('POST',)):
+    """Limits a view to ``rate`` requests ("5/m") per user and per IP.
+
+    Requests over the limit get a 429. While more than
+    ``RATELIMIT_MAX_CONCURRENT_WRITES`` limited requests are running in
+    this worker, new ones are shed with a 503 instead of queueing behind
+    the database writer.
+    """
+    def decorator(view_func):
+        scope = view_func.__name__
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in methods:
+                return view_func(request, *args, **kwargs)
+            for key in client_keys(request, scope):
+                retry_after = take_token(key, rate)
+                if retry_after:
+                    metrics.incr(f'ratelimit.throttled.{scope}')
+                    return too_many_requests(request, retry_after)
+            if not _write_slots.acquire(blocking=False):
+                metrics.incr(f'ratelimit.shed.{scope}')
+                return service_unavailable(
+                    request, settings.RATELIMIT_SHED_RETRY_AFTER)
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                _write_slots.release()
+        return wrapped
+    return decorator
@@ -0,0 +1,34 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .compression import COMPRESSIBLE_EXTENSIONS, compress_static
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes ``.br`` and ``.gz`` siblings of
+    every compressible file, so they are never compressed per request."""
+
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(paths) | set(self.hashed_files.values()):
+                self._compress(name)
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < self.min_compress_size:
+            return
+        for coding, suffix in ENCODING_SUFFIXES.items():
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            compressed = compress_static(data, coding)
+            if len(compressed) < len(data):
+                self._save(compressed_name, ContentFile(compressed))
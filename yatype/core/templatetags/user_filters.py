@@ -6,3 +6,10 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.filter
+def app_view_name(match):
+    """``app_name:url_name`` of a resolver match, whichever instance
+    namespace its URLs were included under."""
+    return f'{match.app_name}:{match.url_name}' if match else ''
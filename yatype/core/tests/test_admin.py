@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@mock.patch.object(PostAdmin, 'list_per_page', 2)
+class LargeTableAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.group = Group.objects.create(
+            title='Admin group', slug='admin', description='Admin')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.admin, group=cls.group, text=f'Post {number}')
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_keyset_pages(self):
+        response = self.client.get(self.url)
+        changelist = response.context['cl']
+        self.assertEqual(
+            list(changelist.result_list), [self.posts[4], self.posts[3]])
+        self.assertEqual(changelist.next_cursor, self.posts[3].pk)
+        self.assertEqual(changelist.result_count, self.posts[-1].pk)
+        self.assertIsNone(changelist.full_result_count)
+
+        response = self.client.get(self.url + changelist.next_page_url)
+        changelist = response.context['cl']
+        self.assertEqual(
+            list(changelist.result_list), [self.posts[2], self.posts[1]])
+        response = self.client.get(self.url + changelist.next_page_url)
+        changelist = response.context['cl']
+        self.assertEqual(list(changelist.result_list), [self.posts[0]])
+        self.assertIsNone(changelist.next_cursor)
+
+    def test_next_page_is_found_without_another_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].next_cursor, self.posts[3].pk)
+        page_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "posts_post"' in query['sql']
+            and 'LIMIT' in query['sql']]
+        self.assertEqual(len(page_queries), 1, page_queries)
+
+    def test_group_is_an_autocomplete_widget(self):
+        Group.objects.create(title='Unused group', slug='unused')
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'Unused group')
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_sorting_by_column_uses_numbered_pages(self):
+        response = self.client.get(self.url, {'o': '3'})
+        changelist = response.context['cl']
+        self.assertFalse(changelist.keyset)
+        self.assertEqual(changelist.paginator.num_pages, 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'last'})
+        self.assertRedirects(
+            response, self.url + '?e=1', fetch_redirect_response=False)
+
+    def test_comment_and_follow_changelists(self):
+        for name in ('posts_comment', 'posts_follow', 'posts_group'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(f'admin:{name}_changelist'))
+                self.assertEqual(response.status_code, 200)
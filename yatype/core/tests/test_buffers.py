@@ -0,0 +1,42 @@
+import time
+
+from django.test import SimpleTestCase
+
+from ..buffers import WriteBuffer
+
+
+class WriteBufferTests(SimpleTestCase):
+
+    def test_idle_buffer_is_flushed_after_the_interval(self):
+        batches = []
+        buffer = WriteBuffer(batches.append, max_size=100, interval=0.05)
+        buffer.add('a', 1)
+        self.assertEqual(batches, [])
+        for _ in range(100):
+            if batches:
+                break
+            time.sleep(0.01)
+        self.assertEqual(batches, [{'a': 1}])
+        buffer._timer.join(1)
+        self.assertIsNone(buffer._timer)
+        buffer.add('b', 2)
+        self.assertIsNotNone(buffer._timer)
+        buffer.flush()
+
+    def test_failed_flush_keeps_the_items(self):
+        batches = []
+
+        def flush(items):
+            if not batches:
+                batches.append(None)
+                raise RuntimeError('database is locked')
+            batches.append(items)
+
+        buffer = WriteBuffer(
+            flush, merge=lambda old, new: old + new, interval=60)
+        buffer.add('a', 1)
+        with self.assertLogs('core.buffers', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        buffer.add('a', 2)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(batches[-1], {'a': 3})
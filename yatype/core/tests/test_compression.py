@@ -0,0 +1,62 @@
+import gzip
+import zlib
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import metrics
+from ..compression import compress_stream
+
+User = get_user_model()
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def test_brotli_is_preferred(self):
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'reader'}),
+            HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn(b'</html>', brotli.decompress(response.content))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_uncompressed_without_accept_encoding(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_page_is_stored_compressed(self):
+        first = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        second = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'Last updates', gzip.decompress(second.content))
+
+        timings = metrics.snapshot()['timings']
+        ratios = [
+            timing for name, timing in timings.items()
+            if name.startswith('compression.ratio.')]
+        self.assertEqual(len(ratios), 1)
+        self.assertEqual(ratios[0]['count'], 1)
+        self.assertLess(ratios[0]['max'], 1)
+
+    def test_stream_is_compressed_chunk_by_chunk(self):
+        chunks = [b'event %d\n' % number for number in range(3)]
+        compressed = list(compress_stream(iter(chunks), 'gzip'))
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(compressed[0]), chunks[0])
+        self.assertEqual(
+            gzip.decompress(b''.join(compressed)), b''.join(chunks))
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.signals import request_finished
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase
+
+from .. import metrics
+from ..db.backends.sqlite3_pool.base import close_pool, get_pool
+from ..db.pool import ConnectionPool
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.opened = []
+
+    def connect(self):
+        connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.opened.append(connection)
+        return connection
+
+    def test_released_connections_are_reused(self):
+        pool = ConnectionPool('test', self.connect, max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+        counters = metrics.snapshot()['counters']
+        self.assertEqual(counters['db.pool.test.created'], 1)
+        self.assertEqual(counters['db.pool.test.reused'], 1)
+        self.assertIn('db.pool.test.wait_ms', metrics.snapshot()['timings'])
+
+    def test_size_is_bounded_and_waiters_time_out(self):
+        pool = ConnectionPool('test', self.connect, max_size=1, timeout=0.05)
+        connection = pool.acquire()
+        with self.assertRaises(OperationalError):
+            pool.acquire()
+        self.assertEqual(
+            metrics.snapshot()['counters']['db.pool.test.timeouts'], 1)
+
+        waiter = {}
+        thread = threading.Thread(
+            target=lambda: waiter.update(connection=pool.acquire()))
+        pool.timeout = 5
+        thread.start()
+        time.sleep(0.05)
+        pool.release(connection)
+        thread.join()
+        self.assertIs(waiter['connection'], connection)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_old_and_broken_connections_are_replaced(self):
+        pool = ConnectionPool('test', self.connect, max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertEqual(pool.stats()['size'], 0)
+
+        pool = ConnectionPool('test', self.connect)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.close()
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats(), {
+            'size': 1, 'idle': 0, 'in_use': 1, 'max_size': 8})
+
+    def test_release_rolls_back(self):
+        pool = ConnectionPool('test', self.connect)
+        connection = pool.acquire()
+        connection.execute('CREATE TABLE item (id INTEGER)')
+        connection.commit()
+        connection.execute('INSERT INTO item VALUES (1)')
+        pool.release(connection)
+        connection = pool.acquire()
+        self.assertEqual(
+            connection.execute('SELECT COUNT(*) FROM item').fetchone(), (0,))
+
+
+class PooledBackendTests(TestCase):
+    alias = 'pool_test'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases[self.alias] = {
+            'ENGINE': 'core.db.backends.sqlite3_pool',
+            'NAME': os.path.join(directory.name, 'pool.sqlite3'),
+            'POOL': {'MAX_SIZE': 2, 'PRAGMAS': {'journal_mode': 'wal'}},
+        }
+        self.addCleanup(connections.databases.pop, self.alias)
+        self.addCleanup(close_pool, self.alias)
+
+    def test_closing_returns_the_connection_to_the_pool(self):
+        connection = connections[self.alias]
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone(), ('wal',))
+        raw = connection.connection
+        connection.close()
+        self.assertEqual(get_pool(self.alias).stats()['idle'], 1)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIs(connection.connection, raw)
+        connection.close()
+
+    def test_request_threads_give_their_connection_back(self):
+        connections.databases[self.alias]['POOL'].update(TIMEOUT=1)
+        errors = []
+
+        def request():
+            # A query, then the close Django does when the request ends.
+            try:
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                request_finished.send(sender=type(self))
+            except OperationalError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = get_pool(self.alias).stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertLessEqual(stats['size'], 2)
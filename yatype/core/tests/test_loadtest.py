@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from ..loadtest import Recorder, parse_weights, percentile, summarize
+
+
+class LoadTestTests(SimpleTestCase):
+
+    def test_parse_weights(self):
+        self.assertEqual(
+            parse_weights('index=3,post=1'), {'index': 3, 'post': 1})
+        with self.assertRaises(ValueError):
+            parse_weights('shopping=1')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 100)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary_separates_errors_from_shed_requests(self):
+        recorder = Recorder()
+        for status in (200, 302, 429, 500):
+            recorder.add('post', status, 0.01)
+        summary = summarize(recorder, elapsed=2)
+        self.assertEqual(summary['total']['requests'], 4)
+        self.assertEqual(summary['total']['rps'], 2)
+        self.assertEqual(summary['scenarios']['post']['error_rate'], 0.25)
+        self.assertEqual(summary['scenarios']['post']['shed_rate'], 0.25)
+        self.assertEqual(summary['total']['p50_ms'], 10)
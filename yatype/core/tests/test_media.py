@@ -0,0 +1,82 @@
+import gzip
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = b'0123456789' * 100
+
+
+@override_settings(MEDIA_ROOT=TEMP_ROOT, STATIC_ROOT=TEMP_ROOT)
+class FileServingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(TEMP_ROOT, 'app.0123456789ab.css'), 'wb') as f:
+            f.write(CONTENT)
+        with open(os.path.join(TEMP_ROOT, 'app.0123456789ab.css.gz'),
+                  'wb') as f:
+            f.write(gzip.compress(CONTENT))
+
+    def test_media_is_served_with_far_future_headers(self):
+        response = self.client.get('/media/app.0123456789ab.css')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(
+            '/media/app.0123456789ab.css',
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_byte_range(self):
+        response = self.client.get(
+            '/media/app.0123456789ab.css', HTTP_RANGE='bytes=5-14')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[5:15])
+        self.assertEqual(response['Content-Range'], 'bytes 5-14/1000')
+
+        response = self.client.get(
+            '/media/app.0123456789ab.css', HTTP_RANGE='bytes=0-99',
+            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[:100])
+
+        response = self.client.get(
+            '/media/app.0123456789ab.css', HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        for header in ('bytes=0-9,20-29', 'items=0-9', 'bytes=9-0'):
+            response = self.client.get(
+                '/media/app.0123456789ab.css', HTTP_RANGE=header)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_static_prefers_precompressed_file(self):
+        response = self.client.get(
+            '/static/app.0123456789ab.css', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), CONTENT)
+
+    @override_settings(FILE_OFFLOAD_HEADER='X-Accel-Redirect')
+    def test_offload_to_web_server(self):
+        response = self.client.get('/media/app.0123456789ab.css')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/internal/media/app.0123456789ab.css')
+        self.assertEqual(response.content, b'')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT)
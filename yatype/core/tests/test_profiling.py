@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..profiling import categorize, make_token, read_collapsed, rotate
+
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR, PROFILING_MODE='cprofile')
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+
+    def profiles(self, view):
+        directory = os.path.join(PROFILING_DIR, view)
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def test_only_signed_requests_are_profiled(self):
+        Client().get(reverse('posts:index'))
+        Client().get(reverse('posts:index'), HTTP_X_PROFILE='forged:token')
+        self.assertEqual(self.profiles('yatype_app_index'), [])
+        Client().get(reverse('posts:index'), HTTP_X_PROFILE=make_token())
+        self.assertEqual(len(self.profiles('yatype_app_index')), 1)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_are_profiled(self):
+        Client().get(reverse('posts:index'))
+        self.assertEqual(len(self.profiles('yatype_app_index')), 1)
+
+    def test_rotation_keeps_newest(self):
+        os.makedirs(PROFILING_DIR)
+        for stamp in range(5):
+            open(os.path.join(
+                PROFILING_DIR, f'{stamp}-1.collapsed'), 'w').close()
+        rotate(PROFILING_DIR, 2)
+        self.assertEqual(
+            sorted(os.listdir(PROFILING_DIR)),
+            ['3-1.collapsed', '4-1.collapsed'])
+
+    def test_report_merges_collapsed_stacks(self):
+        directory = os.path.join(PROFILING_DIR, 'index')
+        os.makedirs(directory)
+        stack = 'view (posts/views.py:1);execute (django/db/utils.py:1)'
+        for stamp in range(2):
+            with open(os.path.join(
+                    directory, f'{stamp}-1.collapsed'), 'w') as output:
+                output.write(f'{stack} 3\nview (posts/views.py:1) 1\n')
+        out = StringIO()
+        call_command('profile_report', stdout=out)
+        merged = read_collapsed(
+            os.path.join(PROFILING_DIR, 'report', 'index.collapsed'))
+        self.assertEqual(merged[stack], 6)
+        self.assertEqual(
+            categorize(merged), Counter({'orm': 6, 'other': 2}))
+        self.assertIn('2 sampled requests, 8 samples', out.getvalue())
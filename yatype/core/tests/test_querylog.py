@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..querylog import fingerprint, plan_flags
+
+User = get_user_model()
+SLOW_QUERY_LOG = os.path.join(tempfile.mkdtemp(), 'slow.jsonl')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=SLOW_QUERY_LOG)
+class SlowQueryLogTests(TestCase):
+
+    def tearDown(self):
+        if os.path.exists(SLOW_QUERY_LOG):
+            os.remove(SLOW_QUERY_LOG)
+
+    def entries(self):
+        with open(SLOW_QUERY_LOG) as log:
+            return [json.loads(line) for line in log]
+
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 1 AND b = 'x'")[0],
+            fingerprint("SELECT * FROM t WHERE a = 22 AND b = 'y''z'")[0])
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)')[0],
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)')[0])
+
+    def test_plan_flags(self):
+        self.assertEqual(
+            plan_flags(['SCAN posts_post', 'USE TEMP B-TREE FOR ORDER BY']),
+            ['full_scan', 'temp_btree'])
+        self.assertEqual(
+            plan_flags(['SEARCH posts_post USING INDEX x (author_id=?)']), [])
+
+    def test_follow_index_queries_are_logged_with_plan(self):
+        user = User.objects.create_user(username='slowReader')
+        client = Client()
+        client.force_login(user)
+        client.get(reverse('posts:follow_index'))
+        entries = [
+            entry for entry in self.entries()
+            if entry['view'] == 'yatype_app:follow_index'
+            and 'posts_post' in entry['sql']]
+        self.assertTrue(entries)
+        self.assertTrue(entries[0]['plan'])
+        self.assertTrue(any(
+            'posts/views.py' in frame for frame in entries[0]['stack']))
+
+        out = StringIO()
+        call_command('slow_query_report', stdout=out)
+        self.assertIn('yatype_app:follow_index', out.getvalue())
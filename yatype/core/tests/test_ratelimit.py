@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, RequestFactory
+from django.urls import reverse
+
+from .. import metrics
+from ..ratelimit import ratelimit, take_token
+
+User = get_user_model()
+
+
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_bucket_allows_burst_then_throttles(self):
+        for _ in range(3):
+            self.assertEqual(take_token('bucket', '3/m'), 0)
+        self.assertAlmostEqual(take_token('bucket', '3/m'), 20, delta=1)
+
+    def test_only_limited_methods_are_counted(self):
+        view = ratelimit('1/m')(lambda request: 'ok')
+        factory = RequestFactory()
+        request = factory.get('/')
+        request.user = User()
+        for _ in range(3):
+            self.assertEqual(view(request), 'ok')
+
+
+class WriteEndpointsLimitTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='spammer')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_post_create_is_throttled(self):
+        url = reverse('posts:post_create')
+        for number in range(10):
+            response = self.client.post(url, {'text': f'Spam {number}'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        response = self.client.post(url, {'text': 'One more'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(
+            metrics.snapshot()['counters'],
+            {'ratelimit.throttled.post_create': 1})
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.templatetags.post_cards import card_key
+from ..warmup import warm_up
+
+User = get_user_model()
+
+
+@override_settings(
+    SITE_URL='http://testserver', WARMUP_ACCEPT_ENCODINGS=[''],
+    WARMUP_MIN_CACHE_TIMEOUT=0)
+class WarmupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='early')
+        Post.objects.create(author=cls.user, text='Before warmup')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_is_rendered_into_cache(self):
+        timings = warm_up(pages=1, groups=0, profiles=1)
+        self.assertEqual(
+            [(name, count) for name, count, _ in timings if count is None],
+            [])
+        Post.objects.create(author=self.user, text='After warmup')
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Before warmup')
+        self.assertNotContains(response, 'After warmup')
+
+    @override_settings(WARMUP_MIN_CACHE_TIMEOUT=60)
+    def test_pages_are_warmed_for_their_post_cards(self):
+        # The index itself is cached for less than a minute.
+        self.assertLess(settings.INDEX_CACHE_TIMEOUT, 60)
+        timings = warm_up(pages=1, groups=0, profiles=1)
+        self.assertIn(('pages', 2), [
+            (name, count) for name, count, _ in timings])
+        post = Post.objects.get(text='Before warmup')
+        self.assertIsNotNone(cache.get(card_key(post, True, True)))
+        self.assertIsNotNone(cache.get(card_key(post, False, True)))
+
+    @override_settings(
+        WARMUP_MIN_CACHE_TIMEOUT=60, INDEX_CACHE_TIMEOUT=20,
+        POST_CARD_CACHE_TIMEOUT=20)
+    def test_short_lived_pages_are_not_warmed(self):
+        timings = warm_up(pages=3, groups=0, profiles=1)
+        self.assertIn(('pages', 0), [
+            (name, count) for name, count, _ in timings])
+
+    def test_command_reports_timings(self):
+        output = StringIO()
+        call_command('warm_cache', pages=1, stdout=output)
+        self.assertIn('templates', output.getvalue())
+        self.assertIn('Warmed up in', output.getvalue())
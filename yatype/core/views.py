@@ -1,7 +1,12 @@
+import math
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(
@@ -23,3 +28,22 @@ def page_not_found(request, exception):
     return render(
         request, 'core/404.html', {'path': request.path},
         status=HTTPStatus.NOT_FOUND)
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', status=HTTPStatus.TOO_MANY_REQUESTS)
+    response['Retry-After'] = math.ceil(retry_after)
+    return response
+
+
+def service_unavailable(request, retry_after):
+    response = render(
+        request, 'core/503.html', status=HTTPStatus.SERVICE_UNAVAILABLE)
+    response['Retry-After'] = math.ceil(retry_after)
+    return response
+
+
+@staff_member_required
+def metrics_snapshot(request):
+    return JsonResponse(metrics.snapshot())
@@ -0,0 +1,146 @@
+import logging
+import os
+import time
+from collections import Counter
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.http.request import validate_host
+from django.template import engines
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post
+from posts.sharding import first_rows
+
+logger = logging.getLogger(__name__)
+
+
+def template_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from template_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def compile_templates():
+    names = set()
+    for engine in engines.all():
+        for directory in template_dirs(engine.engine.template_loaders):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if name.endswith(('.html', '.txt', '.xml')):
+                        names.add((engine, os.path.relpath(
+                            os.path.join(root, name), directory)))
+    for engine, name in names:
+        engine.get_template(name)
+    return len(names)
+
+
+def import_views():
+    count = 0
+    for app_config in apps.get_app_configs():
+        try:
+            import_module(f'{app_config.name}.views')
+        except ModuleNotFoundError as error:
+            if error.name != f'{app_config.name}.views':
+                raise
+        else:
+            count += 1
+    return count
+
+
+def open_connections():
+    for alias in connections:
+        connections[alias].ensure_connection()
+    # Closing hands pooled connections back, idle and ready for the request
+    # threads, instead of keeping a slot for this thread.
+    connections.close_all()
+    return len(connections.databases)
+
+
+def worth_warming(page_timeout=0):
+    # Rendering a page also caches its post cards, which usually outlive the
+    # page itself.
+    return max(page_timeout, settings.POST_CARD_CACHE_TIMEOUT) >= \
+        settings.WARMUP_MIN_CACHE_TIMEOUT
+
+
+def warm_urls(pages, groups, profiles):
+    urls = []
+    if worth_warming(settings.INDEX_CACHE_TIMEOUT):
+        urls += [
+            reverse('posts:index') + (f'?page={number}' if number > 1 else '')
+            for number in range(1, pages + 1)
+        ]
+    # The newest posts tell which groups and authors are active, using the
+    # primary key index instead of counting posts over the whole table.
+    recent = first_rows(
+        Post.objects.order_by('-pk').values_list(
+            'pk', 'group__slug', 'author__username'),
+        settings.WARMUP_RECENT_POSTS, key=lambda row: row[0])
+    group_counts = Counter(slug for _, slug, _ in recent if slug)
+    author_counts = Counter(username for _, _, username in recent)
+    if not worth_warming():
+        groups = profiles = 0
+    urls += [
+        reverse('posts:group_list', kwargs={'slug': slug})
+        for slug, _ in group_counts.most_common(groups)
+    ]
+    urls += [
+        reverse('posts:profile', kwargs={'username': username})
+        for username, _ in author_counts.most_common(profiles)
+    ]
+
+    base_url = urlsplit(settings.SITE_URL)
+    if not validate_host(base_url.hostname, settings.ALLOWED_HOSTS):
+        logger.warning(
+            'Warming up pages for %s, which is not in ALLOWED_HOSTS',
+            base_url.netloc)
+    client = Client()
+    for url in urls:
+        # Cached pages vary on Accept-Encoding, so every common value gets
+        # its own entry.
+        for accept_encoding in settings.WARMUP_ACCEPT_ENCODINGS:
+            try:
+                client.get(
+                    url,
+                    HTTP_HOST=base_url.netloc,
+                    HTTP_ACCEPT_ENCODING=accept_encoding,
+                    secure=base_url.scheme == 'https',
+                )
+            except Exception:
+                logger.exception('Could not warm up %s', url)
+    return len(urls)
+
+
+def warm_up(pages=None, groups=None, profiles=None):
+    """Runs every warmup step and returns ``[(step, count, seconds)]``.
+
+    A failing step is logged and skipped: warming up must never keep a
+    worker from starting.
+    """
+    steps = (
+        ('templates', compile_templates),
+        ('views', import_views),
+        ('connections', open_connections),
+        ('pages', lambda: warm_urls(
+            settings.WARMUP_INDEX_PAGES if pages is None else pages,
+            settings.WARMUP_GROUPS if groups is None else groups,
+            settings.WARMUP_PROFILES if profiles is None else profiles,
+        )),
+    )
+    timings = []
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            logger.exception('Warmup step "%s" failed', name)
+            count = None
+        timings.append((name, count, time.perf_counter() - started))
+    return timings
@@ -1,17 +1,40 @@
 from django.contrib import admin
 
+from core.admin import LargeTableAdminMixin
 from .models import Post, Group, Follow, Comment
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'views')
+    readonly_fields = ('views',)
     list_editable = ('group',)
-    search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
+    search_fields = ('=author__username', 'text')
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
 
-admin.site.register(Group)
-admin.site.register(Follow)
-admin.site.register(Comment)
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+@admin.register(Comment)
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    search_fields = ('=author__username', 'text')
+    date_hierarchy = 'created'
+    empty_value_display = '-пусто-'
+
+
+@admin.register(Follow)
+class FollowAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
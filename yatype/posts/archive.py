@@ -0,0 +1,152 @@
+import time
+
+from django.db import (
+    DEFAULT_DB_ALIAS, DatabaseError, connections, transaction)
+from django.db.models import Case, DateTimeField, Value, When
+from django.http import Http404
+
+from core import metrics
+from . import feeds, group_stats, profiles, tags
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .sharding import databases, find_post
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'author_id', 'group_id', 'image',
+    'image_variants', 'text_html', 'excerpt_html', 'render_version', 'views')
+COMMENT_FIELDS = ('id', 'text', 'author_id', 'post_id', 'created')
+
+
+def _dates(rows, field):
+    # bulk_create() overwrites auto_now(_add) fields, so the original
+    # dates are put back with one UPDATE per batch.
+    return Case(
+        *(When(pk=row['id'], then=Value(row[field])) for row in rows),
+        output_field=DateTimeField())
+
+
+def _move(ids, database, source, target, source_comments, target_comments):
+    with transaction.atomic(using=database):
+        posts = list(source.objects.using(database).filter(
+            pk__in=ids).values(*POST_FIELDS))
+        comments = list(source_comments.objects.using(database).filter(
+            post_id__in=ids).values(*COMMENT_FIELDS))
+        target.objects.using(database).bulk_create(
+            [target(**row) for row in posts], ignore_conflicts=True)
+        target_comments.objects.using(database).bulk_create(
+            [target_comments(**row) for row in comments],
+            ignore_conflicts=True)
+        if target is Post and posts:
+            Post.objects.using(database).filter(pk__in=ids).update(
+                pub_date=_dates(posts, 'pub_date'),
+                updated=_dates(posts, 'updated'))
+        if target_comments is Comment and comments:
+            Comment.objects.using(database).filter(post_id__in=ids).update(
+                created=_dates(comments, 'created'))
+        source_comments.objects.using(database).filter(
+            post_id__in=ids).delete()
+        source.objects.using(database).filter(pk__in=ids).delete()
+        if target is Post:
+            # Tags, mentions and group stats only cover hot posts.
+            tags.index_posts(
+                Post.objects.using(database).filter(pk__in=ids).only(
+                    'pk', 'text', 'pub_date'),
+                using=database)
+            group_stats.recompute(
+                {row['group_id'] for row in posts} - {None})
+    if target is Post:
+        # Deleting from Post drops the feeds through signals, restoring
+        # with bulk_create() does not.
+        feeds.invalidate(
+            {row['group_id'] for row in posts},
+            {row['author_id'] for row in posts})
+        profiles.invalidate(*{row['author_id'] for row in posts})
+    return len(posts), len(comments)
+
+
+def _batches(queryset, batch_size, pause, move):
+    """Moves ``queryset`` in batches of ``batch_size`` posts, each in its
+    own short transaction, and yields ``(posts, comments)`` per batch.
+
+    Sleeping ``pause`` seconds between batches lets other writers take the
+    database lock. Every shard is moved in turn.
+    """
+    for database in databases():
+        while True:
+            ids = list(queryset.using(database).order_by('pk').values_list(
+                'pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            yield move(ids, database)
+            time.sleep(pause)
+
+
+def archive_posts(cutoff, batch_size, pause=0):
+    for posts, comments in _batches(
+            Post.objects.filter(pub_date__lt=cutoff), batch_size, pause,
+            lambda ids, database: _move(
+                ids, database, Post, ArchivedPost, Comment,
+                ArchivedComment)):
+        metrics.incr('archive.posts_archived', posts)
+        metrics.incr('archive.comments_archived', comments)
+        yield posts, comments
+
+
+def restore_posts(queryset, batch_size, pause=0):
+    for posts, comments in _batches(
+            queryset, batch_size, pause,
+            lambda ids, database: _move(
+                ids, database, ArchivedPost, Post, ArchivedComment,
+                Comment)):
+        metrics.incr('archive.posts_restored', posts)
+        metrics.incr('archive.comments_restored', comments)
+        yield posts, comments
+
+
+def get_post(post_id):
+    """Returns ``(post, comments, archived)``, looking in the archive when
+    the post is not in the hot table."""
+    try:
+        post = find_post(Post, post_id, Post.objects.select_related(
+            'author', 'group'))
+    except Post.DoesNotExist:
+        try:
+            post = find_post(ArchivedPost, post_id, ArchivedPost.objects
+                             .select_related('author', 'group'))
+        except ArchivedPost.DoesNotExist:
+            raise Http404('No post matches the given query.')
+        return post, post.comments.select_related('author'), True
+    return post, Comment.objects.using(post._state.db).filter(
+        post_id=post_id), False
+
+
+def table_size(model, using=DEFAULT_DB_ALIAS):
+    """Bytes used by the table of ``model`` and its indexes, when SQLite
+    was built with the dbstat table."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN '
+                '(SELECT name FROM sqlite_master '
+                "WHERE type = 'index' AND tbl_name = %s)", [table, table])
+            return cursor.fetchone()[0] or 0
+    except DatabaseError:
+        return None
+
+
+def archive_stats():
+    """Rows and bytes of the hot and archive tables, summed over the
+    shards."""
+    stats = {}
+    for model in (Post, Comment, ArchivedPost, ArchivedComment):
+        sizes = [table_size(model, database) for database in databases()]
+        stats[model._meta.db_table] = {
+            'rows': sum(
+                model._default_manager.using(database).count()
+                for database in databases()),
+            'bytes': None if None in sizes else sum(sizes),
+        }
+    return stats
@@ -0,0 +1,233 @@
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.translation import ngettext
+
+from core import metrics
+from .models import DigestEvent, DigestSubscription, Follow, Post
+from .sharding import databases
+
+User = get_user_model()
+UNSUBSCRIBE_SALT = 'posts.digests.unsubscribe'
+WINDOWS = {
+    DigestSubscription.DAILY: timedelta(days=1),
+    DigestSubscription.WEEKLY: timedelta(days=7),
+}
+
+
+def unsubscribe_token(user_id):
+    return signing.dumps(user_id, salt=UNSUBSCRIBE_SALT)
+
+
+def user_id_from_token(token):
+    try:
+        return signing.loads(token, salt=UNSUBSCRIBE_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _author_events(oldest):
+    """``{author_id: [(created, post_id), ...]}`` oldest first, for the
+    authors who posted since ``oldest``. The events live in the shard of
+    their post."""
+    author_events = defaultdict(list)
+    for database in databases():
+        rows = DigestEvent.objects.using(database).filter(
+            created__gt=oldest).values_list('author_id', 'created', 'post_id')
+        for author_id, created, post_id in rows.iterator():
+            author_events[author_id].append((created, post_id))
+    for events in author_events.values():
+        events.sort()
+    return author_events
+
+
+def _subscribers(size):
+    """Ids of the users who follow anyone, in chunks of ``size``."""
+    last = 0
+    while True:
+        user_ids = list(Follow.objects.filter(user_id__gt=last).order_by(
+            'user_id').values_list('user_id', flat=True).distinct()[:size])
+        if not user_ids:
+            return
+        yield user_ids
+        last = user_ids[-1]
+
+
+def _since(subscription, now):
+    """Start of the posts due in the digest of a user, or None when it is
+    not due."""
+    frequency = (subscription.frequency if subscription
+                 else settings.DIGEST_DEFAULT_FREQUENCY)
+    if frequency not in WINDOWS:
+        return None
+    since = now - WINDOWS[frequency]
+    last_sent = subscription and subscription.last_sent
+    if last_sent:
+        if last_sent > since:
+            return None
+        since = last_sent
+    return since
+
+
+def _newest(author_events, author_ids, since, limit):
+    # Every list is sorted, so the posts after ``since`` are found by
+    # bisection and only the newest ``limit`` of them are merged.
+    tails = []
+    count = 0
+    for author_id in author_ids:
+        events = author_events.get(author_id)
+        if not events:
+            continue
+        start = bisect_right(events, (since, float('inf')))
+        count += len(events) - start
+        tails.append(islice(reversed(events), len(events) - start))
+    newest = islice(heapq.merge(*tails, reverse=True), limit)
+    return count, [post_id for _, post_id in newest]
+
+
+def collect(now):
+    """Groups the outbox per recipient, a chunk of followers at a time:
+    yields ``{user_id: (count, post_ids)}`` for the followers whose digest
+    is due, with the number of posts since their last digest and the ids of
+    the newest ``DIGEST_MAX_POSTS`` of them.
+
+    The follows are in the default database and the events in the shards,
+    so they are joined here.
+    """
+    author_events = _author_events(now - max(WINDOWS.values()))
+    if not author_events:
+        return
+    for user_ids in _subscribers(settings.DIGEST_BATCH_SIZE):
+        subscriptions = DigestSubscription.objects.in_bulk(user_ids)
+        followed = defaultdict(list)
+        for user_id, author_id in Follow.objects.filter(
+                user_id__in=user_ids).values_list('user_id', 'author_id'):
+            if author_id in author_events:
+                followed[user_id].append(author_id)
+        due = {}
+        for user_id, author_ids in followed.items():
+            since = _since(subscriptions.get(user_id), now)
+            if since is None:
+                continue
+            count, post_ids = _newest(
+                author_events, author_ids, since, settings.DIGEST_MAX_POSTS)
+            if count:
+                due[user_id] = count, post_ids
+        if due:
+            yield due
+
+
+def _mark_sent(user_ids, now):
+    DigestSubscription.objects.bulk_create(
+        [DigestSubscription(
+            user_id=user_id, frequency=settings.DIGEST_DEFAULT_FREQUENCY)
+         for user_id in user_ids],
+        ignore_conflicts=True)
+    DigestSubscription.objects.filter(user_id__in=user_ids).update(
+        last_sent=now)
+
+
+def _load_posts(posts, post_ids):
+    # Posts already loaded for an earlier chunk of followers are reused.
+    wanted = post_ids - set(posts)
+    for database in databases():
+        posts.update(Post.objects.using(database).select_related(
+            'author', 'group').in_bulk(wanted))
+
+
+def send_digests(now=None):
+    """Sends every due digest through one ``EMAIL_BACKEND`` connection, in
+    batches of ``DIGEST_BATCH_SIZE`` messages, and returns how many were
+    sent.
+
+    Every post is rendered once, however many digests it appears in.
+    """
+    now = now or timezone.now()
+    posts = {}
+    post_template = get_template('posts/email/digest_post.html')
+    html_template = get_template('posts/email/digest.html')
+    text_template = get_template('posts/email/digest.txt')
+    site_url = settings.SITE_URL
+    rendered = {}
+
+    def render_post(post):
+        if post.pk not in rendered:
+            rendered[post.pk] = mark_safe(post_template.render(
+                {'post': post, 'site_url': site_url}))
+        return rendered[post.pk]
+
+    def messages(connection):
+        for due in collect(now):
+            _load_posts(posts, {
+                post_id for _, post_ids in due.values()
+                for post_id in post_ids})
+            recipients = User.objects.exclude(email='').in_bulk(due)
+            for user_id, user in recipients.items():
+                count, post_ids = due[user_id]
+                digest_posts = [
+                    posts[post_id] for post_id in post_ids
+                    if post_id in posts]
+                if not digest_posts:
+                    continue
+                yield user_id, digest_message(
+                    connection, user, count, digest_posts)
+
+    def digest_message(connection, user, count, digest_posts):
+        unsubscribe_url = site_url + reverse(
+            'posts:digest_unsubscribe',
+            kwargs={'token': unsubscribe_token(user.pk)})
+        context = {
+            'user': user,
+            'posts': digest_posts,
+            'more': max(count - len(digest_posts), 0),
+            'unsubscribe_url': unsubscribe_url,
+            'settings_url': site_url + reverse('posts:digest_settings'),
+            'site_url': site_url,
+        }
+        message = EmailMultiAlternatives(
+            subject=ngettext(
+                '%(count)d new post from the authors you follow',
+                '%(count)d new posts from the authors you follow',
+                count) % {'count': count},
+            body=text_template.render(context),
+            to=[user.email],
+            headers={'List-Unsubscribe': f'<{unsubscribe_url}>'},
+            connection=connection,
+        )
+        context['items'] = [render_post(post) for post in digest_posts]
+        message.attach_alternative(
+            html_template.render(context), 'text/html')
+        return message
+
+    sent = 0
+    with get_connection() as connection:
+        for batch in _chunks(messages(connection),
+                             settings.DIGEST_BATCH_SIZE):
+            sent += connection.send_messages(
+                [message for _, message in batch]) or 0
+            _mark_sent([user_id for user_id, _ in batch], now)
+    metrics.incr('digests.sent', sent)
+    for database in databases():
+        DigestEvent.objects.using(database).filter(
+            created__lt=now - max(WINDOWS.values())).delete()
+    return sent
@@ -0,0 +1,170 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def post_event(post):
+    return {
+        'id': post.pk,
+        'author_id': post.author_id,
+        'group_id': post.group_id,
+        'pub_date': post.pub_date.isoformat(),
+    }
+
+
+class Subscription:
+    """A single listener with a bounded backlog of undelivered events.
+
+    When a slow client lets the backlog overflow, the oldest events are
+    dropped and ``overflowed`` tells the stream to ask for a full reload.
+    """
+
+    def __init__(self, matcher, maxsize):
+        self.matcher = matcher
+        self.overflowed = False
+        self._events = deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+
+    def put(self, event):
+        if not self.matcher(event):
+            return
+        with self._ready:
+            if len(self._events) == self._events.maxlen:
+                self.overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+
+    def wait(self, timeout):
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+
+class Broker:
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, matcher):
+        subscription = Subscription(matcher, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        if event_log is not None:
+            event_log.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        if event_log is not None:
+            event_log.append(event)
+        else:
+            self.dispatch(event)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class SQLiteEventLog:
+    """Shares events between worker processes through a small SQLite file.
+
+    Every worker appends to the log and runs one tailing thread that hands
+    new rows to the local broker, so open streams never touch the main
+    database.
+    """
+
+    def __init__(self, path, poll_interval, retention):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS events '
+            '(id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)')
+        return db
+
+    def append(self, event):
+        db = self._connect()
+        try:
+            with db:
+                cursor = db.execute(
+                    'INSERT INTO events (payload) VALUES (?)',
+                    (json.dumps(event),))
+                db.execute(
+                    'DELETE FROM events WHERE id <= ?',
+                    (cursor.lastrowid - self.retention,))
+        finally:
+            db.close()
+
+    def start(self):
+        with self._lock:
+            # A forked worker inherits the object but not the thread, and the
+            # thread stops on an error it does not expect.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._tail, name='post-events', daemon=True)
+                self._thread.start()
+
+    def _tail(self):
+        db = self._connect()
+        last_id = db.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                rows = db.execute(
+                    'SELECT id, payload FROM events WHERE id > ? ORDER BY id',
+                    (last_id,)).fetchall()
+            except sqlite3.Error:
+                logger.exception('Could not read the post event log')
+                continue
+            for last_id, payload in rows:
+                broker.dispatch(json.loads(payload))
+
+
+event_log = None
+if settings.EVENTS_LOG_PATH:
+    event_log = SQLiteEventLog(
+        settings.EVENTS_LOG_PATH,
+        settings.EVENTS_LOG_POLL_INTERVAL,
+        settings.EVENTS_LOG_RETENTION,
+    )
+broker = Broker()
+
+
+def stream_events(matcher):
+    subscription = broker.subscribe(matcher)
+    try:
+        yield f'retry: {settings.EVENTS_RETRY * 1000}\n\n'
+        deadline = time.monotonic() + settings.EVENTS_STREAM_LIFETIME
+        while time.monotonic() < deadline:
+            events = subscription.wait(settings.EVENTS_HEARTBEAT)
+            if subscription.overflowed:
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            if not events:
+                yield ': ping\n\n'
+            for event in events:
+                yield (f'id: {event["id"]}\nevent: post\n'
+                       f'data: {json.dumps(event)}\n\n')
+    finally:
+        broker.unsubscribe(subscription)
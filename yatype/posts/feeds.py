@@ -0,0 +1,148 @@
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from .models import Group, Post, User
+from .sharding import author_posts, gather
+
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+FEED_KEY = 'feeds:{}:{}:{}'
+LOOKUP_KEY = 'feeds:{}:id:{}'
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatype: last updates'
+    description = 'The newest posts of all authors.'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def items(self, obj):
+        return gather(Post.objects.select_related(
+            'author', 'group'))[:settings.FEEDS_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(10)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def title(self, obj):
+        return f'Yatype: group {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def items(self, obj):
+        return gather(obj.posts.select_related(
+            'author', 'group'))[:settings.FEEDS_ITEMS]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def title(self, obj):
+        return f'Yatype: posts of {obj.username}'
+
+    def description(self, obj):
+        return f'All posts of user {obj.username}.'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def items(self, obj):
+        return author_posts(Post.objects, obj.pk).filter(
+            author=obj).select_related(
+            'author', 'group')[:settings.FEEDS_ITEMS]
+
+
+FEEDS = {
+    'site': (LatestPostsFeed, None, None),
+    'group': (GroupPostsFeed, Group, 'slug'),
+    'author': (AuthorPostsFeed, User, 'username'),
+}
+
+
+def _object_id(kind, lookup):
+    """Maps a group slug or a username to its id through the cache, so a
+    cached feed is served without a query."""
+    key = LOOKUP_KEY.format(kind, lookup)
+    object_id = cache.get(key)
+    if object_id is None:
+        _, model, field = FEEDS[kind]
+        object_id = get_object_or_404(model, **{field: lookup}).pk
+        cache.set(key, object_id, settings.FEEDS_CACHE_TIMEOUT)
+    return object_id
+
+
+def _generate(request, kind, object_id, fmt):
+    feed_class, model, _ = FEEDS[kind]
+    obj = get_object_or_404(model, pk=object_id) if model else None
+    feed = feed_class()
+    feed.feed_type = FEED_TYPES[fmt]
+    generator = feed.get_feed(obj, request)
+    content = generator.writeString('utf-8').encode()
+    latest = generator.latest_post_date()
+    return {
+        'content': content,
+        'content_type': generator.content_type,
+        'etag': f'"{hashlib.md5(content).hexdigest()}"',
+        'last_modified': timegm(latest.utctimetuple()),
+    }
+
+
+def serve_feed(request, kind, fmt, lookup=None):
+    """Serves a feed from the cache, generating it on a miss. Posts being
+    saved or deleted drop the feeds they appear in (``invalidate``)."""
+    if fmt not in FEED_TYPES:
+        raise Http404('Unknown feed format.')
+    object_id = _object_id(kind, lookup) if lookup is not None else 0
+    key = FEED_KEY.format(kind, object_id, fmt)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _generate(request, kind, object_id, fmt)
+        cache.set(key, entry, settings.FEEDS_CACHE_TIMEOUT)
+
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'])
+    if response is None:
+        response = HttpResponse(
+            entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = f'public, max-age={settings.FEEDS_MAX_AGE}'
+    return response
+
+
+def invalidate(group_ids=(), author_ids=()):
+    keys = [FEED_KEY.format('site', 0, fmt) for fmt in FEED_TYPES]
+    for kind, ids in (('group', group_ids), ('author', author_ids)):
+        keys += [
+            FEED_KEY.format(kind, object_id, fmt)
+            for object_id in ids if object_id for fmt in FEED_TYPES]
+    cache.delete_many(keys)
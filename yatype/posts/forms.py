@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
-from .models import Post, Comment, Follow
+from .images import check_upload, normalize_image
+from .models import Post, Comment, DigestSubscription, Follow
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +10,14 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        check_upload(image)
+        self.instance.image_variants = ''
+        return normalize_image(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -19,3 +29,9 @@ class FollowForm(forms.ModelForm):
     class Meta:
         model = Follow
         fields = ('author',)
+
+
+class DigestSubscriptionForm(forms.ModelForm):
+    class Meta:
+        model = DigestSubscription
+        fields = ('frequency',)
@@ -0,0 +1,107 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Count, DateTimeField, F, Max, OuterRef, Q, Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Group, GroupStats, Post
+from .sharding import databases, enabled
+
+RECENT = timedelta(hours=24)
+
+
+def _latest_post(group_id):
+    # Served by the (group, -pub_date) index.
+    latest = Post.objects.filter(group_id=group_id).order_by(
+        '-pub_date').values('pub_date')[:1]
+    if not enabled():
+        return Subquery(latest)
+    dates = [
+        latest.using(database).values_list('pub_date', flat=True).first()
+        for database in databases()]
+    return Value(
+        max(filter(None, dates), default=None), output_field=DateTimeField())
+
+
+def record_post(group_id, pub_date, delta):
+    """Counts a post added to (``delta=1``) or removed from (``-1``) a
+    group, without reading the posts of the group."""
+    if group_id is None:
+        return
+    recent = int(pub_date >= timezone.now() - RECENT)
+    if delta > 0:
+        changes = {
+            'post_count': F('post_count') + 1,
+            'posts_24h': F('posts_24h') + recent,
+            'last_activity': Greatest(
+                Coalesce('last_activity', Value(pub_date)), Value(pub_date)),
+        }
+    else:
+        changes = {
+            'post_count': Greatest(F('post_count') - 1, Value(0)),
+            'posts_24h': Greatest(F('posts_24h') - recent, Value(0)),
+            'last_activity': _latest_post(group_id),
+        }
+    if not GroupStats.objects.filter(group_id=group_id).update(**changes):
+        recompute([group_id])
+
+
+def recompute(group_ids=None, now=None):
+    """Rebuilds the stats of ``group_ids`` (all groups by default) from the
+    posts table of every shard."""
+    since = (now or timezone.now()) - RECENT
+    groups = Group.objects.all()
+    posts = Post.objects.exclude(group=None)
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+        posts = posts.filter(group_id__in=group_ids)
+    rows = {}
+    for database in databases():
+        for row in posts.using(database).values('group').annotate(
+                count=Count('pk'), last=Max('pub_date'),
+                recent=Count('pk', filter=Q(pub_date__gte=since))
+        ).order_by():
+            total = rows.setdefault(
+                row['group'], {'count': 0, 'last': None, 'recent': 0})
+            total['count'] += row['count']
+            total['recent'] += row['recent']
+            total['last'] = max(filter(None, (total['last'], row['last'])))
+    stats = []
+    for group_id in groups.values_list('pk', flat=True):
+        row = rows.get(group_id, {})
+        stats.append(GroupStats(
+            group_id=group_id,
+            post_count=row.get('count', 0),
+            last_activity=row.get('last'),
+            posts_24h=row.get('recent', 0)))
+    with transaction.atomic():
+        GroupStats.objects.filter(
+            group_id__in=[row.group_id for row in stats]).delete()
+        GroupStats.objects.bulk_create(stats)
+    return len(stats)
+
+
+def refresh_recent(now=None):
+    """Drops the posts older than 24 hours from ``posts_24h``, reading only
+    the groups that had recent posts."""
+    since = (now or timezone.now()) - RECENT
+    stats = GroupStats.objects.filter(posts_24h__gt=0)
+    if enabled():
+        counts = Counter()
+        for database in databases():
+            counts.update(dict(Post.objects.using(database).filter(
+                pub_date__gte=since).exclude(group=None).values_list(
+                'group').annotate(count=Count('pk')).order_by()))
+        stats = list(stats)
+        for row in stats:
+            row.posts_24h = counts[row.group_id]
+        GroupStats.objects.bulk_update(stats, ['posts_24h'])
+        return len(stats)
+    recent_posts = Post.objects.filter(
+        group=OuterRef('group'), pub_date__gte=since,
+    ).order_by().values('group').annotate(count=Count('pk')).values('count')
+    return stats.update(
+        posts_24h=Coalesce(Subquery(recent_posts), Value(0)))
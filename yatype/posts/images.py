@@ -0,0 +1,113 @@
+import json
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+VARIANT_MIME_TYPES = {'AVIF': 'image/avif', 'WEBP': 'image/webp'}
+METADATA_KEYS = {
+    'exif', 'icc_profile', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment'}
+
+
+def check_upload(upload):
+    """Rejects oversized files and decompression bombs from the image header
+    alone, before any pixel data is decoded."""
+    if upload.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Image file is too large.', code='file_too_large')
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Image resolution is too large.', code='too_many_pixels')
+
+
+def normalize_image(upload):
+    """Downscales the upload to ``IMAGE_MAX_SIDE`` and re-encodes it in the
+    original format, which drops EXIF and other metadata.
+
+    Animated images and images that are already small and carry no
+    metadata are returned unchanged.
+    """
+    max_side = settings.IMAGE_MAX_SIDE
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if getattr(image, 'is_animated', False) or (
+                max(image.size) <= max_side
+                and not METADATA_KEYS & image.info.keys()):
+            upload.seek(0)
+            return upload
+        image_format = image.format
+        # JPEG can be decoded at 1/2..1/8 scale straight away.
+        image.draft(image.mode, (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        output = BytesIO()
+        image.save(
+            output,
+            format=image_format,
+            optimize=True,
+            quality=settings.IMAGE_QUALITY,
+        )
+    return ContentFile(output.getvalue(), name=upload.name)
+
+
+def variant_formats():
+    return [
+        image_format for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def variant_name(name, width, image_format):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(
+        settings.IMAGE_VARIANTS_DIR, f'{stem}_{width}.{image_format.lower()}')
+
+
+def build_variants(image_file):
+    """Saves card-sized crops of ``image_file`` for every configured width
+    and supported format and returns them as a JSON string.
+
+    Variants are named after the (content-addressed) source file, so an
+    image that was uploaded before reuses the existing ones.
+    """
+    variants = {}
+    missing = []
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        for image_format in variant_formats():
+            variants.setdefault(image_format, []).append(width)
+            name = variant_name(image_file.name, width, image_format)
+            if not default_storage.exists(name):
+                missing.append((name, width, image_format))
+    if missing:
+        image_file.open('rb')
+        with Image.open(image_file) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            for name, width, image_format in missing:
+                crop = ImageOps.fit(image, (width, width // 2), Image.LANCZOS)
+                output = BytesIO()
+                crop.save(
+                    output, format=image_format,
+                    quality=settings.IMAGE_QUALITY)
+                default_storage.save(name, ContentFile(output.getvalue()))
+        image_file.close()
+    return json.dumps(variants)
+
+
+def variant_sources(image_file, variants):
+    sources = []
+    for image_format, widths in json.loads(variants or '{}').items():
+        srcset = []
+        for width in widths:
+            name = variant_name(image_file.name, width, image_format)
+            srcset.append(f'{default_storage.url(name)} {width}w')
+        sources.append({
+            'type': VARIANT_MIME_TYPES[image_format],
+            'srcset': ', '.join(srcset),
+        })
+    return sources
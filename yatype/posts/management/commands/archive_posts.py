@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts, archive_stats
+
+
+class Command(BaseCommand):
+    help = ('Moves posts older than the cutoff, with their comments, from '
+            'the hot tables into the archive tables.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Archive posts published more than this many days ago.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=settings.ARCHIVE_BATCH_PAUSE,
+            help='Seconds to sleep between batches.')
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Only print the size of the hot and archive tables.')
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            total_posts = total_comments = 0
+            for posts, comments in archive_posts(
+                    cutoff, options['batch_size'], options['pause']):
+                total_posts += posts
+                total_comments += comments
+                self.stdout.write(
+                    f'{total_posts} posts, {total_comments} comments '
+                    f'archived')
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {total_posts} posts published before '
+                f'{cutoff:%Y-%m-%d}.'))
+        for table, stats in archive_stats().items():
+            size = '?' if stats['bytes'] is None else f'{stats["bytes"]:,}'
+            self.stdout.write(
+                f'{table:<24}{stats["rows"]:>12,} rows{size:>16} bytes')
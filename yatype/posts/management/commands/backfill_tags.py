@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.sharding import databases
+from posts.tags import index_posts
+
+
+class Command(BaseCommand):
+    help = ('Parses the hashtags and mentions of existing posts, in batches '
+            'of primary keys.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.TAGS_BACKFILL_BATCH_SIZE)
+        parser.add_argument(
+            '--start', type=int, default=0,
+            help='Resume after this post id.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for database in databases():
+            last = options['start']
+            posts = Post.objects.using(database).only(
+                'pk', 'text', 'pub_date').order_by('pk')
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last)[:options['batch_size']])
+                if not batch:
+                    break
+                index_posts(batch, using=database)
+                last, total = batch[-1].pk, total + len(batch)
+                self.stdout.write(
+                    f'{total} posts indexed, up to id {last} in {database}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed the tags and mentions of {total} posts.'))
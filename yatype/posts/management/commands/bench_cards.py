@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine, engines
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Card markup as it was inlined in every list page before the post card
+# component, with the thumbnail library loaded inside the loop.
+INLINE_CARDS = '''
+{% for post in posts %}
+  {% load thumbnail %}
+  <article>
+    <ul style="color:rgb(57,17,161);list-style-type: none">
+      <li>
+        <span style="font-weight: 500">Author: </span> {{ post.author }}
+      </li>
+      <li>
+        <span style="font-weight: 500">Date created: </span>
+        {{ post.pub_date|date:"d E Y" }}
+      </li>
+    </ul>
+    <p>{{ post.text }}</p>
+    {% thumbnail post.image "960x480" crop="center" upscale=True as im %}
+      <img class="card-img my-2" src="{{ im.url }}" alt="">
+    {% endthumbnail %}
+    <ul style="list-style-type: none">
+      <li><a style="color:rgb(57,17,161)"
+             href="{% url 'posts:profile' post.author %}">
+        all author's posts</a></li>
+      <li><a style="color:rgb(57,17,161)"
+             href="{% url 'posts:post_detail' post.pk %}">
+        detailed information</a></li>
+      {% if post.group %}
+        <li><a style="color:rgb(57,17,161)"
+               href="{% url 'posts:group_list' post.group.slug %}">
+          all group's posts</a>
+        </li>
+      {% endif %}
+    </ul>
+  </article>
+  {% if not forloop.last %}
+    <hr>
+  {% endif %}
+{% endfor %}
+'''
+COMPONENT_CARDS = '''
+{% load post_cards %}
+{% post_cards posts show_author=True show_group=True as cards %}
+{% for post, card in cards %}
+  {{ card }}
+  {% include 'posts/includes/reactions.html' %}
+  {% if not forloop.last %}
+    <hr>
+  {% endif %}
+{% endfor %}
+'''
+
+
+class Command(BaseCommand):
+    help = ('Compares the render time of a page of post cards with inline '
+            'markup and with the cached post card component.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=50)
+        parser.add_argument('--renders', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # The cached loader is only on with DEBUG off; without it every card
+        # would compile its included templates again.
+        django_engine = engines['django'].engine
+        engine = Engine(
+            dirs=django_engine.dirs, app_dirs=django_engine.app_dirs,
+            libraries=django_engine.libraries, debug=False)
+        author = User(username='bench')
+        group = Group(title='Bench', slug='bench')
+        # Unsaved posts with fixed ids keep the database out of the timings.
+        posts = [
+            Post(pk=pk, text=f'Post number {pk} ' * 10, author=author,
+                 group=group if pk % 2 else None,
+                 pub_date=timezone.now(), updated=timezone.now())
+            for pk in range(1, options['cards'] + 1)
+        ]
+        # Both pages are compiled once, as the cached loader does, so only
+        # the rendering is timed.
+        page = engine.from_string(INLINE_CARDS)
+        component = engine.from_string(COMPONENT_CARDS)
+
+        def inline():
+            page.render(Context({'posts': posts}))
+
+        def cold():
+            # A new timestamp misses every cached card.
+            updated = timezone.now()
+            for post in posts:
+                post.updated = updated
+            component.render(Context({'posts': posts}))
+
+        def warm():
+            component.render(Context({'posts': posts}))
+
+        self.stdout.write(f'{"mode":<24}{"ms/page":>10}')
+        for name, render in (('inline markup', inline),
+                             ('card, cold cache', cold),
+                             ('card, cached', warm)):
+            render()
+            started = time.perf_counter()
+            for _ in range(options['renders']):
+                render()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name:<24}{elapsed * 1000 / options["renders"]:>10.3f}')
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Writes the gzipped sitemap shards of posts, profiles and groups '
+            'that changed since the last run, and the sitemap index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', default=settings.SITEMAP_ROOT,
+            help='Directory the sitemaps are written to.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rewrite every shard, e.g. after usernames changed.')
+
+    def handle(self, *args, **options):
+        written, unchanged, removed = build_sitemaps(
+            options['root'], options['force'])
+        for name in written:
+            self.stdout.write(f'wrote {name}')
+        for name in removed:
+            self.stdout.write(f'removed {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(written)} shards written, {len(unchanged)} unchanged, '
+            f'{len(removed)} removed.'))
@@ -0,0 +1,85 @@
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import ArchivedPost, Post
+from posts.sharding import databases
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+def image_refcounts():
+    refcounts = Counter()
+    for database in databases():
+        for model in (Post, ArchivedPost):
+            refcounts.update(dict(
+                model.objects.using(database).exclude(image='')
+                .exclude(image__isnull=True).values_list('image')
+                .annotate(refs=Count('pk')).order_by()))
+    return refcounts
+
+
+class Command(BaseCommand):
+    help = ('Deletes post images that no post, hot or archived, in any '
+            'shard references any more, together with their thumbnails and '
+            'variants.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=3600,
+            help='Keep unreferenced files younger than this many seconds, '
+                 'they may belong to an upload in progress.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        refcounts = image_refcounts()
+        storage = Post._meta.get_field('image').storage
+        upload_to = Post._meta.get_field('image').upload_to
+        cutoff = time.time() - options['grace']
+        deleted = kept = 0
+
+        for name in walk(storage, upload_to):
+            if refcounts.get(name):
+                kept += 1
+                continue
+            if storage.get_modified_time(name).timestamp() > cutoff:
+                continue
+            deleted += 1
+            self.stdout.write(f'orphan: {name}')
+            if not options['dry_run']:
+                delete_thumbnails(ImageFile(name, storage), delete_file=False)
+                storage.delete(name)
+
+        stems = {
+            os.path.splitext(os.path.basename(name))[0] for name in refcounts}
+        variants_dir = settings.IMAGE_VARIANTS_DIR
+        if default_storage.exists(variants_dir):
+            for name in walk(default_storage, variants_dir):
+                stem = os.path.basename(name).rsplit('_', 1)[0]
+                if stem in stems or (
+                        default_storage.get_modified_time(name).timestamp()
+                        > cutoff):
+                    continue
+                deleted += 1
+                self.stdout.write(f'orphan variant: {name}')
+                if not options['dry_run']:
+                    default_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{kept} referenced files kept, {deleted} orphans '
+            f'{"found" if options["dry_run"] else "deleted"}.'))
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from posts import sharding
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Moves the posts of the given authors to another shard, copies '
+            'users and groups to the shards with --replicate, or shows how '
+            'posts are spread with --stats.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+        parser.add_argument(
+            '--to', choices=settings.POST_SHARDS,
+            help='Database alias to move the authors to.')
+        parser.add_argument(
+            '--replicate', action='store_true',
+            help='Copy every user and group to the other shards.')
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Show the posts and authors of each shard.')
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError('POST_SHARDS is empty.')
+        if options['replicate']:
+            self.replicate()
+        if options['usernames']:
+            if not options['to']:
+                raise CommandError('Give the target shard with --to.')
+            self.move(options['usernames'], options['to'])
+        if options['stats']:
+            self.stats()
+
+    def replicate(self):
+        for model in (User, Group):
+            for instance in model.objects.iterator():
+                sharding.replicate(instance)
+        self.stdout.write('Users and groups copied to every shard.')
+
+    def move(self, usernames, target):
+        for username in usernames:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'No user {username!r}.')
+            moved = sharding.move_author(user.pk, target)
+            self.stdout.write(f'{username}: {moved} posts moved to {target}.')
+
+    def stats(self):
+        for database in sharding.databases():
+            stats = Post.objects.using(database).aggregate(
+                posts=Count('pk'), authors=Count('author', distinct=True))
+            self.stdout.write(
+                f'{database}: {stats["posts"]} posts by '
+                f'{stats["authors"]} authors')
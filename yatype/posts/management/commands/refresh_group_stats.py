@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import recompute, refresh_recent
+
+
+class Command(BaseCommand):
+    help = ('Ages posts older than 24 hours out of the group activity '
+            'counts, or rebuilds all group stats with --full.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recount every group from the posts table.')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            count = recompute()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt the stats of {count} groups.'))
+        else:
+            count = refresh_recent()
+            self.stdout.write(self.style.SUCCESS(
+                f'Refreshed the 24-hour counts of {count} groups.'))
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.rendering import RENDER_VERSION, render_posts
+from posts.sharding import databases
+
+FIELDS = ('text_html', 'excerpt_html', 'render_version')
+
+
+class Command(BaseCommand):
+    help = ('Renders the HTML body and excerpt of the posts rendered by an '
+            'older version of the rendering rules.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.RERENDER_BATCH_SIZE)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Render every post, whatever its render version.')
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            total = 0
+            for database in databases():
+                posts = model.objects.using(database).only(
+                    'pk', 'text').order_by('pk')
+                if not options['all']:
+                    posts = posts.filter(render_version__lt=RENDER_VERSION)
+                last = 0
+                while True:
+                    batch = list(
+                        posts.filter(pk__gt=last)[:options['batch_size']])
+                    if not batch:
+                        break
+                    render_posts(batch)
+                    # bulk_update() leaves ``updated`` alone; cached cards
+                    # are keyed on the render version instead.
+                    model.objects.using(database).bulk_update(batch, FIELDS)
+                    last, total = batch[-1].pk, total + len(batch)
+            self.stdout.write(self.style.SUCCESS(
+                f'Rendered {total} {model._meta.verbose_name_plural}.'))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.archive import restore_posts
+from posts.models import ArchivedPost
+
+
+class Command(BaseCommand):
+    help = 'Moves archived posts and their comments back to the hot tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument('--author', help='Restore all posts of a user.')
+        parser.add_argument(
+            '--all', action='store_true', help='Empty the archive.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=settings.ARCHIVE_BATCH_PAUSE)
+
+    def handle(self, *args, **options):
+        queryset = ArchivedPost.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        elif options['author']:
+            queryset = queryset.filter(author__username=options['author'])
+        elif not options['all']:
+            raise CommandError('Give post ids, --author or --all.')
+        total = 0
+        for posts, _ in restore_posts(
+                queryset, options['batch_size'], options['pause']):
+            total += posts
+        self.stdout.write(self.style.SUCCESS(f'Restored {total} posts.'))
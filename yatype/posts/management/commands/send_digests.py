@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = ('Emails every follower whose digest is due the new posts of the '
+            'authors they follow.')
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f'{sent} digests sent.'))
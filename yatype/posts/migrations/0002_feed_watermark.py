@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seen_post_id', models.PositiveIntegerField(default=0, verbose_name='Last seen post')),
+                ('last_seen', models.DateTimeField(verbose_name='Last visit')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='posts_author_pub_date_idx'),
+        ),
+    ]
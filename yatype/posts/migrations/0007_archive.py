@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_large_table_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='Text')),
+                ('pub_date', models.DateTimeField(verbose_name='Date')),
+                ('updated', models.DateTimeField(verbose_name='Updated')),
+                ('image', models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Image')),
+                ('image_variants', models.TextField(blank=True, editable=False, verbose_name='Image variants')),
+                ('archived', models.DateTimeField(auto_now_add=True, verbose_name='Archived')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group', verbose_name='Group')),
+            ],
+            options={
+                'verbose_name_plural': 'Archived posts',
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name="Comment's text")),
+                ('created', models.DateTimeField(verbose_name='Date')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost', verbose_name='Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['author', '-pub_date'], name='posts_arch_author_date_idx'),
+        ),
+    ]
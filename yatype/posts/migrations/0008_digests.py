@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestSubscription',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='digest_subscription', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('off', 'Never')], default='daily', max_length=10, verbose_name='Digest frequency')),
+                ('last_sent', models.DateTimeField(blank=True, null=True, verbose_name='Last digest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to='posts.Post')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:18
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def create_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    db = schema_editor.connection.alias
+    since = timezone.now() - timedelta(hours=24)
+    GroupStats.objects.using(db).bulk_create([
+        GroupStats(
+            group_id=group.pk, post_count=group.post_count,
+            last_activity=group.last_activity, posts_24h=group.posts_24h)
+        for group in Group.objects.using(db).annotate(
+            post_count=Count('posts'),
+            last_activity=Max('posts__pub_date'),
+            posts_24h=Count('posts', filter=Q(posts__pub_date__gte=since)))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Posts')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Last post')),
+                ('posts_24h', models.PositiveIntegerField(default=0, verbose_name='Posts in the last 24 hours')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-post_count', '-group'], name='posts_groupstats_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_activity', '-group'], name='posts_groupstats_last_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_24h', '-group'], name='posts_groupstats_24h_idx'),
+        ),
+        migrations.RunPython(create_stats, migrations.RunPython.noop),
+    ]
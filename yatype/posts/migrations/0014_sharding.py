@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0013_reactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorShard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_shard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('database', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+    ]
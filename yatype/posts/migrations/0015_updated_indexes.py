@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_sharding'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['id', 'updated'], name='posts_arch_id_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['id', 'updated'], name='posts_id_updated_idx'),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .rendering import render_posts
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -13,12 +16,28 @@ class Group(models.Model):
         return str(self.title)
 
 
+class PostQuerySet(models.QuerySet):
+
+    def create(self, **kwargs):
+        # create() gives the router no instance to look at, so without a
+        # using() the post would land in the default database whatever the
+        # shard of its author.
+        queryset = self
+        author = kwargs.get('author')
+        author_id = author.pk if author else kwargs.get('author_id')
+        if self._db is None and author_id is not None:
+            from .sharding import author_posts
+            queryset = author_posts(self, author_id)
+        return super(PostQuerySet, queryset).create(**kwargs)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Text",
         help_text='Enter post text'
     )
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name="Date")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Updated")
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -37,16 +56,60 @@ class Post(models.Model):
     image = models.ImageField(
         verbose_name='Image',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True,
     )
+    image_variants = models.TextField(
+        verbose_name='Image variants',
+        blank=True,
+        editable=False,
+    )
+    text_html = models.TextField(
+        verbose_name='Rendered text',
+        blank=True,
+        editable=False,
+    )
+    excerpt_html = models.TextField(
+        verbose_name='Rendered excerpt',
+        blank=True,
+        editable=False,
+    )
+    render_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Views',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.text[:15]}'
 
+    def save(self, *args, **kwargs):
+        render_posts([self])
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name_plural = 'Posts'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='posts_author_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='posts_group_pub_date_idx'),
+            models.Index(fields=['pub_date'], name='posts_pub_date_idx'),
+            # Sitemap signatures, Max('updated') over a primary key range,
+            # read this covering index instead of the post rows.
+            models.Index(
+                fields=['id', 'updated'], name='posts_id_updated_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -70,6 +133,11 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True, verbose_name="Date")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created'], name='posts_comment_created_idx'),
+        ]
+
 
 class Follow(models.Model):
     author = models.ForeignKey(
@@ -85,3 +153,303 @@ class Follow(models.Model):
     )
 
     unique_together = [['author', 'user']]
+
+
+class FeedWatermark(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_watermark',
+    )
+    last_seen_post_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Last seen post",
+    )
+    last_seen = models.DateTimeField(verbose_name="Last visit")
+
+
+class ArchivedPost(models.Model):
+    """A post moved out of ``Post`` by ``manage.py archive_posts``.
+
+    It keeps the id of the original post, so links to it keep working and
+    ``manage.py restore_posts`` can move it back unchanged.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name="Text")
+    pub_date = models.DateTimeField(verbose_name="Date")
+    updated = models.DateTimeField(verbose_name="Updated")
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name="Author"
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name="Group",
+    )
+    image = models.ImageField(
+        verbose_name='Image',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+        null=True,
+    )
+    image_variants = models.TextField(
+        verbose_name='Image variants',
+        blank=True,
+        editable=False,
+    )
+    text_html = models.TextField(
+        verbose_name='Rendered text',
+        blank=True,
+        editable=False,
+    )
+    excerpt_html = models.TextField(
+        verbose_name='Rendered excerpt',
+        blank=True,
+        editable=False,
+    )
+    render_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Views',
+    )
+    archived = models.DateTimeField(
+        auto_now_add=True, verbose_name="Archived")
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.text[:15]}'
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name_plural = 'Archived posts'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='posts_arch_author_date_idx'),
+            models.Index(
+                fields=['id', 'updated'], name='posts_arch_id_updated_idx'),
+        ]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name="Comment's text")
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name="Author"
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name="Post",
+    )
+    created = models.DateTimeField(verbose_name="Date")
+
+
+class DigestSubscription(models.Model):
+    """How often a user gets the digest of new posts from the authors they
+    follow. Users without a row get ``DIGEST_DEFAULT_FREQUENCY``."""
+    OFF = 'off'
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    FREQUENCY_CHOICES = (
+        (DAILY, 'Daily'),
+        (WEEKLY, 'Weekly'),
+        (OFF, 'Never'),
+    )
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='digest_subscription',
+    )
+    frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCY_CHOICES,
+        default=DAILY,
+        verbose_name="Digest frequency",
+    )
+    last_sent = models.DateTimeField(
+        blank=True, null=True, verbose_name="Last digest")
+
+
+class DigestEvent(models.Model):
+    """Outbox of new posts for the digests, one row per post no matter how
+    many followers its author has."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='digest_events',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digest_events',
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=64, unique=True, verbose_name="Name")
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """A ``#tag`` in the text of a post. ``pub_date`` is copied from the
+    post so a tag feed is read from the index alone."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    pub_date = models.DateTimeField(verbose_name="Date")
+
+    class Meta:
+        unique_together = [['post', 'tag']]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'],
+                name='posts_posttag_feed_idx'),
+        ]
+
+
+class Mention(models.Model):
+    """An ``@username`` in the text of a post, for the mentions inbox of
+    ``user``."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    pub_date = models.DateTimeField(verbose_name="Date")
+
+    class Meta:
+        unique_together = [['post', 'user']]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='posts_mention_inbox_idx'),
+        ]
+
+
+class GroupStats(models.Model):
+    """Activity of a group, kept up to date by the ``Post`` signals so the
+    groups directory never aggregates ``posts_post``. ``posts_24h`` is
+    decayed by ``manage.py refresh_group_stats``."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    post_count = models.PositiveIntegerField(
+        default=0, verbose_name="Posts")
+    last_activity = models.DateTimeField(
+        blank=True, null=True, verbose_name="Last post")
+    posts_24h = models.PositiveIntegerField(
+        default=0, verbose_name="Posts in the last 24 hours")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-post_count', '-group'],
+                name='posts_groupstats_count_idx'),
+            models.Index(
+                fields=['-last_activity', '-group'],
+                name='posts_groupstats_last_idx'),
+            models.Index(
+                fields=['-posts_24h', '-group'],
+                name='posts_groupstats_24h_idx'),
+        ]
+
+
+class Reaction(models.Model):
+    """A reaction of a user to a post. The post is not a database foreign
+    key, so reactions follow a post into the archive, which keeps its id."""
+    LIKE = 'like'
+    LOVE = 'love'
+    LAUGH = 'laugh'
+    KIND_CHOICES = (
+        (LIKE, 'Like'),
+        (LOVE, 'Love'),
+        (LAUGH, 'Laugh'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='reactions',
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['user', 'post', 'kind']]
+
+
+class ReactionCounter(models.Model):
+    """One of ``REACTION_COUNTER_SHARDS`` partial counts of a reaction kind
+    on a post; the count is their sum."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='reaction_counters',
+    )
+    kind = models.CharField(max_length=10, choices=Reaction.KIND_CHOICES)
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [['post', 'kind', 'shard']]
+
+
+class AuthorShard(models.Model):
+    """Database alias holding the posts of an author, when it differs from
+    the default placement (``posts.sharding.shard_for``)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_shard',
+    )
+    database = models.CharField(max_length=100)
+
+
+class PostSequence(models.Model):
+    """Hands out post ids that are unique across all shards."""
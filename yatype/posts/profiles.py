@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from .models import ArchivedPost, Follow, Post, User
+from .sharding import author_posts
+
+ID_KEY = 'author_header:id:{}'
+VERSION_KEY = 'author_header:version:{}'
+HEADER_KEY = 'author_header:{}:{}'
+FOLLOWING_KEY = 'author_header:following:{}:{}:{}'
+
+
+def _version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate(*user_ids):
+    """Drops the cached headers of ``user_ids``, and the follow states
+    cached against them, by moving them to a new version."""
+    cache.set_many(
+        {VERSION_KEY.format(user_id): time.time_ns()
+         for user_id in set(user_ids) - {None}}, None)
+
+
+def _build(author):
+    posts = author_posts(Post.objects, author.pk).filter(
+        author=author).count()
+    archived = author_posts(ArchivedPost.objects, author.pk).filter(
+        author=author).count()
+    return {
+        'author': author,
+        'display_name': author.get_full_name() or author.username,
+        'posts_count': posts + archived,
+        'followers_count': Follow.objects.filter(author=author).count(),
+        'following_count': Follow.objects.filter(user=author).count(),
+    }
+
+
+def get_header(username):
+    """Returns ``(header, version)`` for the profile of ``username``, from
+    the cache when its version is current."""
+    user_id = cache.get(ID_KEY.format(username))
+    if user_id is not None:
+        version = _version(user_id)
+        header = cache.get(HEADER_KEY.format(user_id, version))
+        # A renamed user leaves the old username pointing at their id.
+        if header is not None and header['author'].username == username:
+            return header, version
+
+    author = get_object_or_404(User, username=username)
+    version = _version(author.pk)
+    header = _build(author)
+    cache.set_many({
+        ID_KEY.format(username): author.pk,
+        HEADER_KEY.format(author.pk, version): header,
+    }, settings.AUTHOR_HEADER_TIMEOUT)
+    return header, version
+
+
+def is_following(user, author_id, version):
+    if not user.is_authenticated:
+        return False
+    key = FOLLOWING_KEY.format(user.pk, author_id, version)
+    following = cache.get(key)
+    if following is None:
+        following = Follow.objects.filter(
+            user_id=user.pk, author_id=author_id).exists()
+        cache.set(key, following, settings.AUTHOR_HEADER_TIMEOUT)
+    return following
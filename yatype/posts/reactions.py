@@ -0,0 +1,75 @@
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from core import metrics
+from .models import Reaction, ReactionCounter
+
+
+def _count(post_id, kind, delta):
+    # Spreading the increments of a popular post over several rows keeps
+    # concurrent reactions from queueing on one row lock.
+    shard = random.randrange(settings.REACTION_COUNTER_SHARDS)
+    counters = ReactionCounter.objects.filter(
+        post_id=post_id, kind=kind, shard=shard)
+    if counters.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(
+                post_id=post_id, kind=kind, shard=shard, count=delta)
+    except IntegrityError:
+        counters.update(count=F('count') + delta)
+
+
+def set_reaction(user, post_id, kind, active):
+    """Turns a reaction on or off. Repeating a request changes nothing, as
+    the counters only move when a reaction row is added or removed."""
+    with transaction.atomic():
+        if active:
+            _, changed = Reaction.objects.get_or_create(
+                user=user, post_id=post_id, kind=kind)
+        else:
+            changed = Reaction.objects.filter(
+                user=user, post_id=post_id, kind=kind).delete()[0]
+        if changed:
+            _count(post_id, kind, 1 if active else -1)
+            metrics.incr(f'reactions.{kind}.{"on" if active else "off"}')
+    return reaction_counts([post_id])[post_id][kind]
+
+
+def reaction_counts(post_ids):
+    """``{post_id: {kind: count}}`` summed over the counter shards, in one
+    query for a whole page."""
+    counts = defaultdict(lambda: dict.fromkeys(
+        (kind for kind, _ in Reaction.KIND_CHOICES), 0))
+    for row in ReactionCounter.objects.filter(post_id__in=post_ids).values(
+            'post_id', 'kind').annotate(total=Sum('count')).order_by():
+        counts[row['post_id']][row['kind']] = row['total']
+    return counts
+
+
+def annotate_reactions(posts, user):
+    """Sets ``reaction_summary`` on ``posts``: ``(kind, label, count,
+    active)`` per kind, ``active`` when ``user`` gave that reaction. Takes
+    two queries whatever the number of posts."""
+    posts = list(posts)
+    post_ids = [post.pk for post in posts]
+    counts = reaction_counts(post_ids)
+    given = set()
+    if user.is_authenticated:
+        given = set(Reaction.objects.filter(
+            user=user, post_id__in=post_ids).values_list('post_id', 'kind'))
+    for post in posts:
+        post.reaction_summary = [
+            (kind, label, counts[post.pk][kind], (post.pk, kind) in given)
+            for kind, label in Reaction.KIND_CHOICES]
+    return posts
+
+
+def delete_reactions(post_id):
+    Reaction.objects.filter(post_id=post_id).delete()
+    ReactionCounter.objects.filter(post_id=post_id).delete()
@@ -0,0 +1,61 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.text import Truncator
+
+# Bump whenever the output of ``render_text`` changes, then run
+# ``manage.py rerender_posts``.
+RENDER_VERSION = 1
+EXCERPT_WORDS = 30
+
+# One pass over the text finds both; the lookbehind skips e-mail addresses,
+# URL fragments and HTML entities.
+TOKEN_RE = re.compile(
+    r'(?<![\w&/])(?:#(?P<tag>\w{1,64})(?!\w)|@(?P<user>[\w.+-]*\w))')
+
+
+def parse(text):
+    """Returns the normalised ``(tags, usernames)`` found in ``text``."""
+    tags, usernames = set(), set()
+    for match in TOKEN_RE.finditer(text):
+        tag, username = match.group('tag', 'user')
+        if tag:
+            tags.add(tag.lower())
+        else:
+            usernames.add(username)
+    return tags, usernames
+
+
+def render_text(text, usernames):
+    """Escapes ``text`` and links its tags and the mentions of
+    ``usernames``, the users that exist."""
+    html, position = [], 0
+    for match in TOKEN_RE.finditer(text):
+        tag, username = match.group('tag', 'user')
+        if tag:
+            url = reverse('posts:tag_posts', kwargs={'name': tag.lower()})
+        elif username in usernames:
+            url = reverse('posts:profile', kwargs={'username': username})
+        else:
+            continue
+        html.append(escape(text[position:match.start()]))
+        html.append(f'<a href="{escape(url)}">{escape(match.group())}</a>')
+        position = match.end()
+    html.append(escape(text[position:]))
+    return ''.join(html)
+
+
+def render_posts(posts):
+    """Fills ``text_html`` and ``excerpt_html`` of ``posts``, with one
+    query for the mentioned users of the whole batch."""
+    mentioned = set().union(*(parse(post.text)[1] for post in posts))
+    usernames = set(get_user_model().objects.filter(
+        username__in=mentioned).values_list('username', flat=True)
+    ) if mentioned else set()
+    for post in posts:
+        post.text_html = render_text(post.text, usernames)
+        post.excerpt_html = render_text(
+            Truncator(post.text).words(EXCERPT_WORDS), usernames)
+        post.render_version = RENDER_VERSION
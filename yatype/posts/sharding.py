@@ -0,0 +1,353 @@
+"""Optional partitioning of posts by author across the database aliases in
+``POST_SHARDS``.
+
+The posts of an author, their comments and the rows hanging off them live
+in one shard. Users and groups are written to the default database and
+copied to every shard, so foreign keys and ``select_related()`` keep working
+inside a shard. Post ids come from a sequence in the default database and
+remember the shard they were created in, ``id % SHARD_ID_STRIDE``.
+"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from .models import (
+    ArchivedComment, ArchivedPost, AuthorShard, Comment, DigestEvent, Follow,
+    Mention, Post, PostSequence, PostTag, Tag, User)
+
+SHARD_ID_STRIDE = 64
+SHARDED_MODELS = {
+    Post, Comment, ArchivedPost, ArchivedComment, PostTag, Tag, Mention,
+    DigestEvent}
+
+_executor = None
+_seeded = False
+
+
+def enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def databases():
+    return list(settings.POST_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def _default_shard(author_id):
+    return settings.POST_SHARDS[author_id % len(settings.POST_SHARDS)]
+
+
+def shard_for(author_id):
+    """The alias holding the posts of ``author_id``: its ``AuthorShard``
+    row once it was moved, otherwise picked by the author id.
+
+    Read on every call, a primary key lookup, rather than cached: a move by
+    ``manage.py rebalance_shards`` must reach every worker at once.
+    """
+    if not enabled():
+        return DEFAULT_DB_ALIAS
+    database = AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id=author_id).values_list('database', flat=True).first()
+    return database or _default_shard(author_id)
+
+
+def shards_for(author_ids):
+    """The aliases holding the posts of ``author_ids``, in one query."""
+    author_ids = set(author_ids)
+    moved = dict(AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id__in=author_ids).values_list('user_id', 'database'))
+    return {
+        moved.get(author_id) or _default_shard(author_id)
+        for author_id in author_ids}
+
+
+def post_databases(post_id):
+    """Aliases to look for a post in, the one it was created in first."""
+    shards = databases()
+    if not enabled():
+        return shards
+    home = post_id % SHARD_ID_STRIDE
+    if home < len(shards):
+        shards.insert(0, shards.pop(home))
+    return shards
+
+
+def seed_post_ids():
+    """Moves ``PostSequence`` past the ids of the posts created before
+    sharding was turned on, which came from the posts table itself."""
+    last = max(
+        model.objects.using(database).aggregate(last=Max('pk'))['last'] or 0
+        for database in databases() for model in (Post, ArchivedPost))
+    floor = last // SHARD_ID_STRIDE + 1
+    sequences = PostSequence.objects.using(DEFAULT_DB_ALIAS)
+    if (sequences.aggregate(last=Max('pk'))['last'] or 0) >= floor:
+        return
+    sequences.bulk_create([PostSequence(pk=floor)], ignore_conflicts=True)
+    # Backends with sequence objects do not see the explicit id otherwise.
+    connection = connections[DEFAULT_DB_ALIAS]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+                no_style(), [PostSequence]):
+            cursor.execute(sql)
+
+
+def allocate_post_id(database):
+    global _seeded
+    if not _seeded:
+        seed_post_ids()
+        _seeded = True
+    shards = settings.POST_SHARDS
+    sequence = PostSequence.objects.using(DEFAULT_DB_ALIAS).create()
+    home = shards.index(database) if database in shards else 0
+    return sequence.pk * SHARD_ID_STRIDE + home
+
+
+def find_post(model, post_id, queryset=None):
+    """Looks ``post_id`` up in its home shard, then in the others."""
+    queryset = model._default_manager.all() if queryset is None else queryset
+    for database in post_databases(post_id):
+        post = queryset.using(database).filter(pk=post_id).first()
+        if post is not None:
+            return post
+    raise model.DoesNotExist
+
+
+def post_moved(post_id, database):
+    """Whether a post deleted from ``database`` lives on in another shard,
+    i.e. it is being moved rather than deleted."""
+    return enabled() and any(
+        Post.objects.using(other).filter(pk=post_id).exists()
+        for other in databases() if other != database)
+
+
+def author_posts(queryset, author_id):
+    return queryset.using(shard_for(author_id)) if enabled() else queryset
+
+
+def _run(function, argument):
+    # Worker threads open their own connections; close them afterwards.
+    try:
+        return function(argument)
+    finally:
+        connections.close_all()
+
+
+def parallel(function, items):
+    """``[function(item) ...]`` with the items run concurrently."""
+    global _executor
+    items = list(items)
+    if len(items) < 2:
+        return [function(item) for item in items]
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_SHARD_WORKERS,
+            thread_name_prefix='post-shards')
+    return list(_executor.map(
+        _run, [function] * len(items), items))
+
+
+class ShardedPosts:
+    """One queryset run on several shards and paginated as a single list,
+    newest first. A page reads up to its last row from every shard in
+    parallel and merges the sorted results."""
+
+    def __init__(self, queryset, shards):
+        self.querysets = [
+            queryset.using(database).order_by('-pub_date', '-pk')
+            for database in shards]
+
+    @cached_property
+    def counts(self):
+        return parallel(lambda queryset: queryset.count(), self.querysets)
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        rows = parallel(
+            lambda queryset: list(queryset[:stop]), self.querysets)
+        merged = heapq.merge(
+            *rows, key=lambda post: (post.pub_date, post.pk), reverse=True)
+        return list(islice(merged, start, stop))
+
+
+def gather(queryset, author_ids=None):
+    """``queryset`` across the shards, or only those of ``author_ids``."""
+    if not enabled():
+        return queryset
+    shards = databases()
+    if author_ids is not None:
+        shards = sorted(shards_for(author_ids))
+    return ShardedPosts(queryset, shards)
+
+
+def first_rows(queryset, limit, key=None):
+    """The first ``limit`` rows of ``queryset`` across the shards. Every
+    shard must return its rows in descending ``key`` order."""
+    if not enabled():
+        return list(queryset[:limit])
+    rows = parallel(
+        lambda database: list(queryset.using(database)[:limit]), databases())
+    return list(islice(heapq.merge(*rows, key=key, reverse=True), limit))
+
+
+def find_first(queryset):
+    """The first row of ``queryset`` in any shard, or None."""
+    for database in databases():
+        row = queryset.using(database).first()
+        if row is not None:
+            return row
+    return None
+
+
+def followed_posts(user):
+    posts = Post.objects.all()
+    if not enabled():
+        return posts.filter(author__following__user=user)
+    # The follows are in the default database only.
+    author_ids = list(Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True))
+    return gather(posts.filter(author_id__in=author_ids), author_ids)
+
+
+def replicate(instance):
+    """Copies a user or group to every shard, without the password."""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields}
+    if 'password' in values:
+        values['password'] = '!'
+    for database in databases():
+        if database == DEFAULT_DB_ALIAS:
+            continue
+        rows = model._base_manager.using(database).filter(pk=instance.pk)
+        if not rows.update(**values):
+            model._base_manager.using(database).bulk_create(
+                [model(**values)])
+
+
+def unreplicate(instance):
+    for database in databases():
+        if database != DEFAULT_DB_ALIAS:
+            type(instance)._base_manager.using(database).filter(
+                pk=instance.pk).delete()
+
+
+def set_shard(author_id, database):
+    AuthorShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        user_id=author_id, defaults={'database': database})
+
+
+def _copy(model, rows, database, dates=()):
+    from .archive import _dates
+
+    model.objects.using(database).bulk_create([model(**row) for row in rows])
+    if rows and dates:
+        # bulk_create() overwrites auto_now(_add) fields.
+        model.objects.using(database).filter(
+            pk__in=[row['id'] for row in rows]).update(
+            **{field: _dates(rows, field) for field in dates})
+
+
+def _renumber(rows, database, *models):
+    # Comments and digest events take their ids from a per-database
+    # sequence, so they get new ones above those used in ``database``.
+    last = max(
+        model.objects.using(database).aggregate(last=Max('pk'))['last'] or 0
+        for model in models)
+    for number, row in enumerate(rows, last + 1):
+        row['id'] = number
+    return rows
+
+
+def move_author(author_id, target):
+    """Moves the posts of an author, with their comments and digest events,
+    to the ``target`` shard. Returns the number of posts moved."""
+    # Imported here: these modules use the helpers above.
+    from . import feeds, group_stats, profiles, tags
+    from .archive import COMMENT_FIELDS, POST_FIELDS
+
+    source = shard_for(author_id)
+    if source == target:
+        return 0
+    with transaction.atomic(using=source), transaction.atomic(using=target):
+        posts = list(Post.objects.using(source).filter(
+            author_id=author_id).values(*POST_FIELDS))
+        archived = list(ArchivedPost.objects.using(source).filter(
+            author_id=author_id).values(*POST_FIELDS, 'archived'))
+        comments = list(Comment.objects.using(source).filter(
+            post__author_id=author_id).values(*COMMENT_FIELDS))
+        archived_comments = list(ArchivedComment.objects.using(source).filter(
+            post__author_id=author_id).values(*COMMENT_FIELDS))
+        events = list(DigestEvent.objects.using(source).filter(
+            post__author_id=author_id).values(
+            'post_id', 'author_id', 'created'))
+
+        _copy(Post, posts, target, ('pub_date', 'updated'))
+        _copy(ArchivedPost, archived, target, ('archived',))
+        # Restoring moves archived comments back with their ids, so both
+        # tables share one range.
+        _renumber(comments + archived_comments, target,
+                  Comment, ArchivedComment)
+        _copy(Comment, comments, target, ('created',))
+        _copy(ArchivedComment, archived_comments, target)
+        _copy(DigestEvent, _renumber(events, target, DigestEvent), target,
+              ('created',))
+        tags.index_posts(
+            Post.objects.using(target).filter(author_id=author_id).only(
+                'pk', 'text', 'pub_date'),
+            using=target)
+
+        ArchivedPost.objects.using(source).filter(
+            author_id=author_id).delete()
+        Post.objects.using(source).filter(author_id=author_id).delete()
+        set_shard(author_id, target)
+
+    group_stats.recompute({row['group_id'] for row in posts} - {None})
+    feeds.invalidate({row['group_id'] for row in posts}, {author_id})
+    profiles.invalidate(author_id)
+    return len(posts)
+
+
+class PostShardRouter:
+    """Sends posts to the shard of their author and everything related to
+    a post to the database of that post. Other models, and any model while
+    ``POST_SHARDS`` is empty, use the default database."""
+
+    def _database(self, model, instance=None, **hints):
+        if not enabled():
+            return None
+        if model not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        if instance is None:
+            return None
+        if not isinstance(instance, model):
+            # A related object: the posts of a user are in its shard.
+            if isinstance(instance, User) and model in (Post, ArchivedPost):
+                return shard_for(instance.pk)
+            return instance._state.db if type(instance) in SHARDED_MODELS \
+                else None
+        if instance._state.adding:
+            if isinstance(instance, (Post, ArchivedPost)):
+                return shard_for(instance.author_id)
+            post_field = getattr(type(instance), 'post', None)
+            if post_field is not None and post_field.is_cached(instance):
+                return instance.post._state.db
+        return instance._state.db or None
+
+    db_for_read = _database
+    db_for_write = _database
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users and groups are copied into every shard.
+        return True if enabled() else None
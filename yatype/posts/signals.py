@@ -0,0 +1,137 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import feeds, group_stats, profiles, reactions, sharding, tags
+from .events import broker, post_event
+from .images import build_variants
+from .models import (
+    ArchivedPost, DigestEvent, Follow, Group, GroupStats, Post, User)
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created:
+        event = post_event(instance)
+        transaction.on_commit(lambda: broker.publish(event))
+
+
+@receiver(post_save, sender=Post)
+def record_digest_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        DigestEvent.objects.using(instance._state.db).create(
+            post=instance, author_id=instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def build_image_variants(sender, instance, **kwargs):
+    if instance.image and not instance.image_variants:
+        instance.image_variants = build_variants(instance.image)
+        # Bumping ``updated`` invalidates a card cached without the variants.
+        instance.updated = timezone.now()
+        Post.objects.using(instance._state.db).filter(pk=instance.pk).update(
+            image_variants=instance.image_variants,
+            updated=instance.updated)
+
+
+@receiver(pre_save, sender=Post)
+def allocate_post_id(sender, instance, using, raw=False, **kwargs):
+    # Shards cannot hand out ids on their own without clashing.
+    if sharding.enabled() and instance.pk is None and not raw:
+        instance.pk = sharding.allocate_post_id(using)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, using, raw=False, **kwargs):
+    # An edit can move the post out of a group, whose feed must go too, and
+    # only a changed text needs its tags parsed again.
+    if instance.pk and not raw:
+        instance._old_group_id, instance._old_text = Post.objects.using(
+            using).filter(pk=instance.pk).values_list(
+            'group_id', 'text').first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def index_tags(sender, instance, created, raw=False, **kwargs):
+    if not raw and (created or instance.text != instance._old_text):
+        tags.index_posts([instance], using=instance._state.db)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feeds(sender, instance, **kwargs):
+    feeds.invalidate(
+        group_ids={instance.group_id,
+                   getattr(instance, '_old_group_id', None)},
+        author_ids={instance.author_id})
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if created:
+        group_stats.record_post(instance.group_id, instance.pub_date, 1)
+    elif old_group_id != instance.group_id:
+        group_stats.record_post(old_group_id, instance.pub_date, -1)
+        group_stats.record_post(instance.group_id, instance.pub_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    group_stats.record_post(instance.group_id, instance.pub_date, -1)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_delete, sender=Post)
+def delete_reactions(sender, instance, **kwargs):
+    # Archiving deletes the post too, but its reactions go with it, and so
+    # does moving it to another shard.
+    if not (ArchivedPost.objects.using(instance._state.db).filter(
+            pk=instance.pk).exists()
+            or sharding.post_moved(instance.pk, instance._state.db)):
+        reactions.delete_reactions(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_author_header(sender, instance, created=True, **kwargs):
+    # Edits leave the counts alone; post_delete sends no ``created``.
+    if created:
+        profiles.invalidate(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_headers(sender, instance, **kwargs):
+    profiles.invalidate(instance.author_id, instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_header(sender, instance, **kwargs):
+    profiles.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_to_shards(sender, instance, using, raw=False,
+                        update_fields=None, **kwargs):
+    # Logins touch nothing the shards use.
+    if (sharding.enabled() and using == DEFAULT_DB_ALIAS and not raw
+            and update_fields != frozenset({'last_login'})):
+        sharding.replicate(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def unreplicate_from_shards(sender, instance, using, **kwargs):
+    if sharding.enabled() and using == DEFAULT_DB_ALIAS:
+        sharding.unreplicate(instance)
@@ -0,0 +1,186 @@
+import gzip
+import heapq
+import json
+import os
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.urls import reverse
+
+from .models import ArchivedPost, Group, Post
+from .sharding import databases
+
+User = get_user_model()
+MANIFEST = 'manifest.json'
+INDEX = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _latest_post(field):
+    # Served by the (author, -pub_date) and (group, -pub_date) indexes.
+    return Subquery(
+        Post.objects.filter(**{field: OuterRef('pk')})
+        .order_by('-pub_date').values('pub_date')[:1])
+
+
+class Section:
+    """One kind of page in the sitemap, split into shards of
+    ``SITEMAP_SHARD_SIZE`` primary keys each.
+
+    ``lastmod`` is the expression giving each URL's last modification and
+    ``latest`` the lookup aggregated into the shard's. The rows are read
+    from every post shard and merged; ``replicated`` rows, users and
+    groups, appear once in each.
+    """
+
+    def __init__(self, name, queryset, location, lastmod, latest,
+                 replicated=False):
+        self.name = name
+        self.queryset = queryset
+        self.location = location
+        self.lastmod = lastmod
+        self.latest = latest
+        self.replicated = replicated
+
+    def shards(self):
+        last = max(
+            self.queryset.using(database).aggregate(
+                last=Max('pk'))['last'] or 0
+            for database in databases())
+        size = settings.SITEMAP_SHARD_SIZE
+        for number in range(last // size + 1):
+            yield number, number * size, (number + 1) * size
+
+    def signature(self, start, end):
+        """``(rows, lastmod)`` of a shard, which changes whenever one of
+        its URLs is added, removed or modified."""
+        counts, lasts = [], []
+        for database in databases():
+            stats = self.queryset.using(database).filter(
+                pk__gte=start, pk__lt=end).aggregate(
+                count=Count('pk', distinct=True), last=Max(self.latest))
+            counts.append(stats['count'])
+            lasts.append(stats['last'])
+        count = max(counts) if self.replicated else sum(counts)
+        last = max(filter(None, lasts), default=None)
+        return count, last and last.isoformat()
+
+    def _rows(self, database, start, end):
+        queryset = self.queryset.using(database).annotate(
+            sitemap_lastmod=self.lastmod).order_by('pk')
+        while True:
+            rows = list(queryset.filter(pk__gte=start, pk__lt=end)[
+                :settings.SITEMAP_CHUNK_SIZE])
+            if not rows:
+                return
+            yield from rows
+            start = rows[-1].pk + 1
+
+    def rows(self, start, end):
+        """Keyset iteration over a shard, yielding ``(location, lastmod)``."""
+        merged = heapq.merge(
+            *(self._rows(database, start, end) for database in databases()),
+            key=lambda row: row.pk)
+        for _, rows in groupby(merged, key=lambda row: row.pk):
+            rows = list(rows)
+            yield self.location(rows[0]), max(
+                filter(None, (row.sitemap_lastmod for row in rows)),
+                default=None)
+
+
+def _post_url(post):
+    return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+
+SECTIONS = (
+    Section(
+        'posts', Post.objects.only('pk'), _post_url,
+        F('updated'), 'updated'),
+    Section(
+        'archive', ArchivedPost.objects.only('pk'), _post_url,
+        F('updated'), 'updated'),
+    Section(
+        'profiles', User.objects.filter(is_active=True).only('username'),
+        lambda user: reverse(
+            'posts:profile', kwargs={'username': user.username}),
+        _latest_post('author'), 'posts__pub_date', replicated=True),
+    Section(
+        'groups', Group.objects.only('slug'),
+        lambda group: reverse(
+            'posts:group_list', kwargs={'slug': group.slug}),
+        _latest_post('group'), 'posts__pub_date', replicated=True),
+)
+
+
+def write_shard(path, rows):
+    """Streams the URLs straight into a gzip file, replacing ``path`` only
+    once it is complete."""
+    site_url = settings.SITE_URL
+    count = 0
+    with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as shard:
+        shard.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="{XMLNS}">\n')
+        for location, lastmod in rows:
+            shard.write(f'<url><loc>{escape(site_url + location)}</loc>')
+            if lastmod:
+                shard.write(f'<lastmod>{lastmod.isoformat()}</lastmod>')
+            shard.write('</url>\n')
+            count += 1
+        shard.write('</urlset>\n')
+    os.replace(path + '.tmp', path)
+    return count
+
+
+def build_sitemaps(root=None, force=False):
+    """Writes the shards whose rows changed since the last run and the
+    sitemap index. Returns ``(written, unchanged, removed)`` shard names."""
+    root = root or settings.SITEMAP_ROOT
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+    written, unchanged, current = [], [], {}
+    for section in SECTIONS:
+        for number, start, end in section.shards():
+            name = f'sitemap-{section.name}-{number}.xml.gz'
+            count, lastmod = section.signature(start, end)
+            if not count:
+                continue
+            signature = [count, lastmod]
+            current[name] = {'signature': signature, 'lastmod': lastmod}
+            if (not force and manifest.get(name, {}).get('signature')
+                    == signature
+                    and os.path.exists(os.path.join(root, name))):
+                unchanged.append(name)
+                continue
+            write_shard(os.path.join(root, name), section.rows(start, end))
+            written.append(name)
+
+    removed = [name for name in manifest if name not in current]
+    for name in removed:
+        if os.path.exists(os.path.join(root, name)):
+            os.remove(os.path.join(root, name))
+
+    with open(os.path.join(root, INDEX + '.tmp'), 'w') as index:
+        index.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<sitemapindex xmlns="{XMLNS}">\n')
+        for name, shard in current.items():
+            location = reverse('sitemap_shard', kwargs={'name': name})
+            index.write(
+                f'<sitemap><loc>{escape(settings.SITE_URL + location)}</loc>')
+            if shard['lastmod']:
+                index.write(f'<lastmod>{shard["lastmod"]}</lastmod>')
+            index.write('</sitemap>\n')
+        index.write('</sitemapindex>\n')
+    os.replace(os.path.join(root, INDEX + '.tmp'), os.path.join(root, INDEX))
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(current, manifest_file, indent=1)
+    return written, unchanged, removed
@@ -0,0 +1,37 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_hash(content):
+    digest = getattr(content, 'content_hash', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    return digest
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores every file under the SHA-256 of its content, so identical
+    uploads share one file (and one set of sorl thumbnails).
+
+    Files are never overwritten or deleted on post edit; orphans are
+    removed by the ``collect_media`` management command.
+    """
+
+    def _save(self, name, content):
+        digest = content_hash(content)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest[:2], digest + extension)
+        if self.exists(name):
+            # A fresh mtime keeps ``collect_media --grace`` from deleting a
+            # reused orphan before the new post referencing it is saved.
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
@@ -0,0 +1,33 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Mention, PostTag, Tag, User
+from .rendering import parse
+
+
+def index_posts(posts, using=DEFAULT_DB_ALIAS):
+    """Replaces the tags and mentions of ``posts`` with the ones in their
+    current text, with a handful of queries for the whole batch. ``using``
+    is the database of the posts."""
+    parsed = {post.pk: (post, *parse(post.text)) for post in posts}
+    names = set().union(*(tags for _, tags, _ in parsed.values()))
+    usernames = set().union(
+        *(usernames for _, _, usernames in parsed.values()))
+    tags = Tag.objects.using(using)
+    tags.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(tags.filter(name__in=names).values_list('name', 'pk'))
+    user_ids = dict(User.objects.filter(
+        username__in=usernames).values_list('username', 'pk'))
+
+    with transaction.atomic(using=using):
+        PostTag.objects.using(using).filter(post_id__in=parsed).delete()
+        Mention.objects.using(using).filter(post_id__in=parsed).delete()
+        PostTag.objects.using(using).bulk_create([
+            PostTag(post_id=post.pk, tag_id=tag_ids[name],
+                    pub_date=post.pub_date)
+            for post, tags, _ in parsed.values() for name in tags])
+        Mention.objects.using(using).bulk_create([
+            Mention(post_id=post.pk, user_id=user_ids[username],
+                    pub_date=post.pub_date)
+            for post, _, usernames in parsed.values()
+            for username in usernames if username in user_ids])
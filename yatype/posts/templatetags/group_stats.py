@@ -0,0 +1,13 @@
+from django import template
+from django.conf import settings
+
+from ..models import GroupStats
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/active_groups.html')
+def active_groups():
+    stats = GroupStats.objects.filter(posts_24h__gt=0).select_related(
+        'group').order_by('-posts_24h', '-group')
+    return {'stats': stats[:settings.ACTIVE_GROUPS_COUNT]}
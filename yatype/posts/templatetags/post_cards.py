@@ -0,0 +1,37 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def card_key(post, show_author, show_group):
+    return (f'post_card:{post.pk}:{post.updated.isoformat()}:'
+            f'{post.render_version}:{int(bool(show_author))}:'
+            f'{int(bool(show_group))}')
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, show_author=False, show_group=False):
+    """``[(post, card html)]`` for a page of posts. The cached cards are read
+    with one ``get_many()`` and the missing ones stored with one
+    ``set_many()``; reactions differ per user and are not part of a card."""
+    posts = list(posts)
+    keys = [card_key(post, show_author, show_group) for post in posts]
+    cached = cache.get_many(keys)
+    card_template = context.template.engine.get_template(
+        'posts/includes/post_card.html')
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            with context.push(
+                    post=post, show_author=show_author,
+                    show_group=show_group):
+                card = rendered[key] = card_template.render(context)
+        cards.append((post, mark_safe(card)))
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
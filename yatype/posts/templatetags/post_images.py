@@ -0,0 +1,13 @@
+from django import template
+
+from ..images import variant_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post):
+    sources = []
+    if post.image:
+        sources = variant_sources(post.image, post.image_variants)
+    return {'post': post, 'sources': sources}
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts, restore_posts
+from ..models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='archiveAuthor')
+        cls.old = [
+            Post.objects.create(author=cls.author, text=f'Old post {number}')
+            for number in range(3)
+        ]
+        cls.old_date = timezone.now() - timedelta(days=1000)
+        Post.objects.filter(pk__in=[post.pk for post in cls.old]).update(
+            pub_date=cls.old_date)
+        Comment.objects.create(
+            author=cls.author, post=cls.old[0], text='Old comment')
+        cls.new = Post.objects.create(author=cls.author, text='New post')
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self):
+        return list(archive_posts(
+            timezone.now() - timedelta(days=365), batch_size=2))
+
+    def test_old_posts_move_in_batches(self):
+        self.assertEqual(self.archive(), [(2, 1), (1, 0)])
+        self.assertEqual(list(Post.objects.all()), [self.new])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        archived = ArchivedComment.objects.get()
+        self.assertEqual(archived.post_id, self.old[0].pk)
+        self.assertEqual(
+            ArchivedPost.objects.get(pk=self.old[0].pk).pub_date,
+            self.old_date)
+
+    def test_views_fall_back_to_the_archive(self):
+        self.archive()
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old[0].pk}))
+        self.assertContains(response, 'Old post 0')
+        self.assertContains(response, 'Old comment')
+        self.assertTrue(response.context['archived'])
+
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': self.author}))
+        self.assertEqual(response.context['posts_count'], 4)
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['New post', 'Old post 0', 'Old post 1', 'Old post 2'])
+
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Old post')
+
+    def test_restore_keeps_ids_and_dates(self):
+        self.archive()
+        list(restore_posts(ArchivedPost.objects.all(), batch_size=10))
+        self.assertFalse(ArchivedPost.objects.exists())
+        restored = Post.objects.get(pk=self.old[0].pk)
+        self.assertEqual(restored.pub_date, self.old_date)
+        self.assertEqual(restored.comments.get().text, 'Old comment')
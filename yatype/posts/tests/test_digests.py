@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..digests import send_digests, unsubscribe_token
+from ..models import DigestSubscription, Follow, Post
+
+User = get_user_model()
+
+
+class DigestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='digestAuthor')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{number}', email=f'r{number}@example.com')
+            for number in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        for number in range(2):
+            Post.objects.create(
+                author=cls.author, text=f'Digest post {number}')
+
+    def test_one_digest_per_follower(self):
+        self.assertEqual(send_digests(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        message = mail.outbox[0]
+        self.assertIn('Digest post 0', message.body)
+        self.assertIn('Digest post 1', message.alternatives[0][0])
+        self.assertIn('List-Unsubscribe', message.extra_headers)
+
+    def test_digest_is_not_sent_again_within_the_window(self):
+        now = timezone.now()
+        send_digests(now)
+        self.assertEqual(send_digests(now + timedelta(hours=1)), 0)
+        Post.objects.create(author=self.author, text='Next day post')
+        mail.outbox = []
+        self.assertEqual(send_digests(now + timedelta(days=1, hours=1)), 3)
+        self.assertNotIn('Digest post 0', mail.outbox[0].body)
+
+    def test_subject_counts_the_posts(self):
+        now = timezone.now()
+        send_digests(now)
+        self.assertEqual(
+            mail.outbox[0].subject,
+            '2 new posts from the authors you follow')
+        Post.objects.create(author=self.author, text='Single post')
+        mail.outbox = []
+        send_digests(now + timedelta(days=1, hours=1))
+        self.assertEqual(
+            mail.outbox[0].subject,
+            '1 new post from the authors you follow')
+
+    @override_settings(DIGEST_MAX_POSTS=1, DIGEST_BATCH_SIZE=2)
+    def test_digest_lists_the_newest_posts(self):
+        self.assertEqual(send_digests(), 3)
+        message = mail.outbox[0]
+        self.assertEqual(
+            message.subject, '2 new posts from the authors you follow')
+        self.assertIn('Digest post 1', message.body)
+        self.assertNotIn('Digest post 0', message.body)
+        self.assertIn('...and 1 more', message.body)
+
+    def test_frequency_and_unsubscribe(self):
+        DigestSubscription.objects.create(
+            user=self.readers[0], frequency=DigestSubscription.WEEKLY)
+        client = Client()
+        url = reverse(
+            'posts:digest_unsubscribe',
+            kwargs={'token': unsubscribe_token(self.readers[1].pk)})
+        self.assertEqual(client.get(url).status_code, 200)
+        client.post(url)
+        self.assertEqual(
+            self.readers[1].digest_subscription.frequency,
+            DigestSubscription.OFF)
+        self.assertEqual(send_digests(), 2)
+
+    def test_settings_view(self):
+        client = Client()
+        client.force_login(self.readers[2])
+        client.post(
+            reverse('posts:digest_settings'), {'frequency': 'weekly'})
+        self.assertEqual(
+            DigestSubscription.objects.get(user=self.readers[2]).frequency,
+            DigestSubscription.WEEKLY)
@@ -0,0 +1,100 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..events import SQLiteEventLog, broker, stream_events
+from ..models import Group
+
+User = get_user_model()
+
+
+class BrokerTests(TestCase):
+
+    def test_subscription_receives_matching_events(self):
+        subscription = broker.subscribe(lambda event: event['group_id'] == 1)
+        try:
+            broker.publish({'id': 1, 'author_id': 1, 'group_id': 1})
+            broker.publish({'id': 2, 'author_id': 1, 'group_id': 2})
+            events = subscription.wait(timeout=0)
+        finally:
+            broker.unsubscribe(subscription)
+        self.assertEqual([event['id'] for event in events], [1])
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    def test_backlog_is_bounded(self):
+        subscription = broker.subscribe(lambda event: True)
+        try:
+            for pk in range(5):
+                broker.publish({'id': pk, 'author_id': 1, 'group_id': None})
+            events = subscription.wait(timeout=0)
+        finally:
+            broker.unsubscribe(subscription)
+        self.assertEqual([event['id'] for event in events], [3, 4])
+        self.assertTrue(subscription.overflowed)
+
+    @override_settings(EVENTS_STREAM_LIFETIME=1, EVENTS_HEARTBEAT=0)
+    def test_stream_formats_events(self):
+        stream = stream_events(lambda event: True)
+        self.assertEqual(next(stream), 'retry: 5000\n\n')
+        broker.publish({'id': 7, 'author_id': 1, 'group_id': None})
+        self.assertTrue(next(stream).startswith('id: 7\nevent: post\n'))
+        stream.close()
+
+    def test_event_log_restarts_a_dead_tail_thread(self):
+        with tempfile.NamedTemporaryFile(suffix='.sqlite3') as log_file:
+            event_log = SQLiteEventLog(log_file.name, 0, 10)
+            with mock.patch.object(event_log, '_tail'):
+                event_log.start()
+                event_log._thread.join()
+                event_log.start()
+                event_log._thread.join()
+                self.assertEqual(event_log._tail.call_count, 2)
+
+
+@override_settings(LIVE_UPDATES=True)
+class StreamViewsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='streamUser')
+        cls.group = Group.objects.create(
+            title='Stream group', slug='stream', description='Stream')
+
+    def test_stream_headers(self):
+        response = Client().get(reverse(
+            'posts:group_stream', kwargs={'slug': self.group.slug}))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response.close()
+
+    def test_stream_gives_the_database_connections_back(self):
+        with mock.patch.object(connections, 'close_all') as close_all:
+            response = Client().get(reverse(
+                'posts:group_stream', kwargs={'slug': self.group.slug}))
+            next(response.streaming_content)
+            close_all.assert_called_once_with()
+        response.close()
+
+    def test_follow_stream_requires_login(self):
+        response = Client().get(reverse('posts:follow_stream'))
+        self.assertRedirects(
+            response, '/auth/login/?next=%2Fstream%2Ffollow%2F')
+
+    def test_pages_subscribe_to_their_stream(self):
+        response = Client().get(reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertContains(
+            response, "new EventSource('/stream/group/stream/')")
+
+    @override_settings(LIVE_UPDATES=False)
+    def test_live_updates_are_off_by_default(self):
+        response = Client().get(reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertNotContains(response, 'EventSource')
+        response = Client().get(reverse(
+            'posts:group_stream', kwargs={'slug': self.group.slug}))
+        self.assertEqual(response.status_code, 204)
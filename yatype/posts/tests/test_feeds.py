@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='feedAuthor')
+        cls.group = Group.objects.create(
+            title='Feed group', slug='feed', description='Feed')
+        cls.other_group = Group.objects.create(
+            title='Other group', slug='other', description='Other')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='First feed post')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds(self):
+        urls = {
+            reverse('posts:site_feed', kwargs={'fmt': 'rss'}): '<rss',
+            reverse('posts:group_feed',
+                    kwargs={'slug': 'feed', 'fmt': 'atom'}): '<feed',
+            reverse('posts:author_feed',
+                    kwargs={'username': 'feedAuthor', 'fmt': 'rss'}): '<rss',
+        }
+        for url, root in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, root)
+                self.assertContains(response, 'First feed post')
+                self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(
+            reverse('posts:site_feed', kwargs={'fmt': 'json'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_feed_revalidates_without_queries(self):
+        url = reverse(
+            'posts:group_feed', kwargs={'slug': 'feed', 'fmt': 'rss'})
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_a_post_regenerates_its_feeds(self):
+        group_url = reverse(
+            'posts:group_feed', kwargs={'slug': 'feed', 'fmt': 'rss'})
+        site_url = reverse('posts:site_feed', kwargs={'fmt': 'rss'})
+        etag = self.client.get(group_url)['ETag']
+        self.client.get(site_url)
+        self.post.text = 'Edited feed post'
+        self.post.group = self.other_group
+        self.post.save()
+        response = self.client.get(group_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'feed post')
+        self.assertContains(self.client.get(site_url), 'Edited feed post')
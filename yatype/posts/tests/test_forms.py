@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -130,8 +131,10 @@ class FormsTests(BaseSetupClass):
         created_post = Post.objects.get(text=form_data['text'])
         self.assertEqual(form_data['text'], created_post.text)
         if 'image' in form_data:
+            form_data['image'].seek(0)
+            digest = hashlib.sha256(form_data['image'].read()).hexdigest()
             self.assertEqual(
-                f'posts/{str(form_data["image"])}',
+                f'posts/{digest[:2]}/{digest}.gif',
                 str(created_post.image))
         self.assertEqual(self.group, created_post.group)
         self.assertEqual(self.user, created_post.author)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='statsAuthor')
+        cls.quiet = Group.objects.create(
+            title='Quiet', slug='quiet', description='Quiet group')
+        cls.busy = Group.objects.create(
+            title='Busy', slug='busy', description='Busy group')
+
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_signals_keep_the_stats(self):
+        self.assertEqual(self.stats(self.quiet).post_count, 0)
+        first = Post.objects.create(
+            author=self.author, group=self.busy, text='First')
+        second = Post.objects.create(
+            author=self.author, group=self.busy, text='Second')
+        stats = self.stats(self.busy)
+        self.assertEqual((stats.post_count, stats.posts_24h), (2, 2))
+        self.assertEqual(stats.last_activity, second.pub_date)
+
+        second.group = self.quiet
+        second.save()
+        stats = self.stats(self.busy)
+        self.assertEqual((stats.post_count, stats.posts_24h), (1, 1))
+        self.assertEqual(stats.last_activity, first.pub_date)
+        self.assertEqual(self.stats(self.quiet).post_count, 1)
+
+        second.delete()
+        stats = self.stats(self.quiet)
+        self.assertEqual((stats.post_count, stats.last_activity), (0, None))
+
+    def test_refresh_ages_out_old_posts(self):
+        post = Post.objects.create(
+            author=self.author, group=self.busy, text='Old')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=2))
+        call_command('refresh_group_stats', stdout=StringIO())
+        stats = self.stats(self.busy)
+        self.assertEqual((stats.post_count, stats.posts_24h), (1, 0))
+
+        GroupStats.objects.all().delete()
+        call_command('refresh_group_stats', full=True, stdout=StringIO())
+        self.assertEqual(self.stats(self.busy).post_count, 1)
+        self.assertEqual(self.stats(self.quiet).post_count, 0)
+
+    def test_directory_and_sidebar(self):
+        Post.objects.create(author=self.author, group=self.busy, text='Hi')
+        url = reverse('posts:group_index')
+        with self.assertNumQueries(2):
+            response = Client().get(url, {'sort': 'posts'})
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.busy, self.quiet])
+        response = Client().get(url, {'sort': 'bogus'})
+        self.assertEqual(response.context['sort'], 'activity')
+
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Most active groups')
+        self.assertContains(response, '1 today')
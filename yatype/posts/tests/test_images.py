@@ -0,0 +1,74 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..forms import PostForm
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(size, exif=None):
+    output = BytesIO()
+    image = Image.new('RGB', size, 'purple')
+    if exif is not None:
+        image.save(output, format='JPEG', exif=exif)
+    else:
+        image.save(output, format='JPEG')
+    return SimpleUploadedFile(
+        'photo.jpg', output.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='photographer')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_decompression_bomb_is_rejected(self):
+        form = PostForm(
+            data={'text': 'Bomb'}, files={'image': make_jpeg((20, 20))})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['image'], ['Image resolution is too large.'])
+
+    @override_settings(IMAGE_MAX_SIDE=100, IMAGE_VARIANT_FORMATS=('WEBP',))
+    def test_upload_is_downscaled_stripped_and_has_variants(self):
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera maker'
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Photo',
+            'image': make_jpeg((400, 200), exif=exif.tobytes()),
+        })
+        post = Post.objects.get(text='Photo')
+
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+        self.assertEqual(
+            json.loads(post.image_variants), {'WEBP': [480, 960]})
+
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '_480.webp 480w')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class AuthorHeaderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='headerAuthor', first_name='Header', last_name='Author')
+        cls.reader = User.objects.create_user(username='headerReader')
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'Post {number}')
+            for number in range(12)])
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse(
+            'posts:profile', kwargs={'username': 'headerAuthor'})
+
+    def test_pages_after_the_first_only_query_the_posts(self):
+        response = Client().get(self.url)
+        self.assertEqual(response.context['posts_count'], 12)
+        self.assertContains(response, 'Header Author')
+        # The hot and archived post counts, the page of posts and the
+        # reaction counts of that page.
+        with self.assertNumQueries(4):
+            response = Client().get(self.url, {'page': 2})
+        self.assertEqual(response.context['author'], self.author)
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+    def test_posts_follows_and_renames_invalidate_the_header(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(self.url)
+        self.assertEqual(response.context['followers_count'], 0)
+        self.assertFalse(response.context['following'])
+
+        Follow.objects.create(author=self.author, user=self.reader)
+        Post.objects.create(author=self.author, text='New post')
+        response = client.get(self.url)
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertEqual(response.context['posts_count'], 13)
+        self.assertTrue(response.context['following'])
+
+        self.author.username = 'renamedAuthor'
+        self.author.save()
+        self.assertEqual(client.get(self.url).status_code, 404)
+        response = client.get(reverse(
+            'posts:profile', kwargs={'username': 'renamedAuthor'}))
+        self.assertEqual(response.context['author'].username, 'renamedAuthor')
+
+    def test_stale_header_does_not_hide_new_posts(self):
+        Client().get(self.url)
+        # Saved by another worker: the header cached here is not invalidated.
+        Post.objects.bulk_create([
+            Post(author=self.author, text='From another worker')])
+        response = Client().get(self.url)
+        self.assertEqual(response.context['posts_count'], 12)
+        self.assertContains(response, 'From another worker')
+
+    def test_deleted_author_is_not_served_from_the_cache(self):
+        author = User.objects.create_user(username='deletedAuthor')
+        url = reverse('posts:profile', kwargs={'username': 'deletedAuthor'})
+        self.assertEqual(Client().get(url).status_code, 200)
+        author.delete()
+        self.assertEqual(Client().get(url).status_code, 404)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import Post, Reaction, ReactionCounter
+from ..reactions import annotate_reactions, reaction_counts, set_reaction
+
+User = get_user_model()
+
+
+class ReactionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='reactAuthor')
+        cls.fans = [
+            User.objects.create_user(username=f'fan{number}')
+            for number in range(5)]
+        cls.post = Post.objects.create(author=cls.author, text='Like me')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.fans[0])
+        self.url = reverse(
+            'posts:react', kwargs={'post_id': self.post.pk, 'kind': 'like'})
+
+    def test_toggle_is_idempotent(self):
+        for _ in range(2):
+            response = self.client.post(
+                self.url, {'state': 'on'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(
+                response.json(), {'kind': 'like', 'count': 1, 'active': True})
+        for _ in range(2):
+            response = self.client.post(self.url, {'state': 'off'})
+            self.assertRedirects(response, reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertFalse(Reaction.objects.exists())
+        self.assertEqual(reaction_counts([self.post.pk])[self.post.pk], {
+            'like': 0, 'love': 0, 'laugh': 0})
+
+        response = self.client.post(
+            self.url, {'next': 'https://evil.example/'})
+        self.assertEqual(response.url, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.assertEqual(self.client.post(reverse(
+            'posts:react', kwargs={'post_id': self.post.pk, 'kind': 'hate'}
+        )).status_code, 404)
+
+    @override_settings(REACTION_COUNTER_SHARDS=3)
+    def test_counts_are_summed_over_shards(self):
+        for fan in self.fans:
+            set_reaction(fan, self.post.pk, 'like', True)
+        set_reaction(self.fans[0], self.post.pk, 'love', True)
+        self.assertLessEqual(
+            ReactionCounter.objects.filter(kind='like').count(), 3)
+        other = Post.objects.create(author=self.author, text='Quiet')
+        with self.assertNumQueries(2):
+            posts = annotate_reactions([self.post, other], self.fans[1])
+        self.assertEqual(posts[0].reaction_summary, [
+            ('like', 'Like', 5, True),
+            ('love', 'Love', 1, False),
+            ('laugh', 'Laugh', 0, False)])
+        self.assertEqual(
+            posts[1].reaction_summary[0], ('like', 'Like', 0, False))
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Like 5')
+
+    def test_index_shows_a_toggle_at_once(self):
+        index = reverse('posts:index')
+        self.assertContains(self.client.get(index), 'Like 0')
+        response = self.client.post(self.url, {'state': 'on', 'next': index})
+        self.assertRedirects(response, index)
+        response = self.client.get(index)
+        self.assertContains(response, 'Like 1')
+        self.assertContains(response, 'name="state" value="off"')
+
+    def test_reactions_survive_archiving_but_not_deletion(self):
+        set_reaction(self.fans[0], self.post.pk, 'like', True)
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000))
+        list(archive_posts(timezone.now() - timedelta(days=365), 10))
+        self.assertEqual(
+            reaction_counts([self.post.pk])[self.post.pk]['like'], 1)
+
+        post = Post.objects.create(author=self.author, text='Deleted')
+        set_reaction(self.fans[0], post.pk, 'like', True)
+        post.delete()
+        self.assertFalse(Reaction.objects.filter(post_id=post.pk).exists())
+        self.assertFalse(
+            ReactionCounter.objects.filter(post_id=post.pk).exists())
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..rendering import RENDER_VERSION, render_text
+
+User = get_user_model()
+
+
+class RenderingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='renderAuthor')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_render_text(self):
+        self.assertEqual(
+            render_text('<b>#Tag</b> @renderAuthor @ghost',
+                        {'renderAuthor'}),
+            '&lt;b&gt;<a href="/tag/tag/">#Tag</a>&lt;/b&gt; '
+            '<a href="/profile/renderAuthor/">@renderAuthor</a> @ghost')
+
+    def test_save_renders_body_and_excerpt(self):
+        words = ' '.join(f'word{number}' for number in range(40))
+        post = Post.objects.create(
+            author=self.author, text=f'Hi @renderAuthor <3 {words}')
+        self.assertEqual(post.render_version, RENDER_VERSION)
+        self.assertIn('&lt;3', post.text_html)
+        self.assertIn('word39', post.text_html)
+        self.assertNotIn('word39', post.excerpt_html)
+        self.assertTrue(post.excerpt_html.endswith('…'))
+
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(
+            response, '<a href="/profile/renderAuthor/">@renderAuthor</a>')
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, post.excerpt_html)
+
+    def test_rerender_command(self):
+        post = Post.objects.create(author=self.author, text='#stale')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='', excerpt_html='', render_version=0)
+        out = StringIO()
+        call_command('rerender_posts', stdout=out)
+        self.assertIn('Rendered 1 Posts.', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.render_version, RENDER_VERSION)
+        self.assertEqual(post.text_html, '<a href="/tag/stale/">#stale</a>')
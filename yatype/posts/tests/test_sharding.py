@@ -0,0 +1,259 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    test_archive, test_digests, test_feeds, test_group_stats, test_sitemaps,
+    test_tags, test_watermarks)
+from .test_storage import SMALL_GIF
+from .. import sharding
+from ..admin import PostAdmin
+from ..archive import archive_posts, restore_posts
+from ..models import ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+# A second post shard, set up as a test database with the default one.
+connections.databases.setdefault('posts1', {
+    'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'})
+
+
+def serial(function, items):
+    # The test database is not visible to connections of other threads.
+    return [function(item) for item in items]
+
+
+class ShardingDisabledTests(TestCase):
+
+    def test_everything_stays_in_the_default_database(self):
+        author = User.objects.create_user(username='unsharded')
+        post = Post.objects.create(author=author, text='Not sharded')
+        self.assertFalse(sharding.enabled())
+        self.assertEqual(sharding.shard_for(author.pk), 'default')
+        self.assertLess(post.pk, sharding.SHARD_ID_STRIDE)
+        self.assertIsInstance(
+            sharding.gather(Post.objects.all()), type(Post.objects.all()))
+
+
+@override_settings(POST_SHARDS=['default'])
+class ShardingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='shardAuthor')
+        cls.other = User.objects.create_user(username='shardOther')
+        cls.group = Group.objects.create(
+            title='Shards', slug='shards', description='Shards')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_new_posts_get_ids_from_the_shared_sequence(self):
+        first = Post(author=self.author, text='First')
+        first.save()
+        second = Post(author=self.author, text='Second')
+        second.save()
+        self.assertEqual(first.pk % sharding.SHARD_ID_STRIDE, 0)
+        self.assertEqual(
+            second.pk - first.pk, sharding.SHARD_ID_STRIDE)
+        self.assertEqual(first._state.db, 'default')
+
+    @override_settings(POST_SHARDS=[])
+    def test_ids_continue_after_the_posts_created_before_sharding(self):
+        older = Post.objects.create(
+            pk=1000, author=self.author, text='Before')
+        with override_settings(POST_SHARDS=['default']), \
+                mock.patch.object(sharding, '_seeded', False):
+            post = Post(author=self.author, text='After')
+            post.save()
+        self.assertGreater(post.pk, older.pk)
+        self.assertEqual(post.pk % sharding.SHARD_ID_STRIDE, 0)
+
+    def test_router_follows_the_author_and_the_post(self):
+        router = sharding.PostShardRouter()
+        post = Post(author=self.author, text='Routed')
+        self.assertEqual(router.db_for_write(Post, instance=post), 'default')
+        self.assertEqual(
+            router.db_for_write(Group, instance=self.group), 'default')
+        post._state.db = 'elsewhere'
+        comment = Comment(post=post, author=self.other, text='Routed')
+        self.assertEqual(
+            router.db_for_write(Comment, instance=comment), 'elsewhere')
+
+    def test_shard_of_an_author_can_be_overridden(self):
+        with override_settings(POST_SHARDS=['default', 'posts1']):
+            self.assertEqual(
+                sharding.shard_for(self.author.pk),
+                ['default', 'posts1'][self.author.pk % 2])
+            sharding.set_shard(self.author.pk, 'posts1')
+            self.assertEqual(sharding.shard_for(self.author.pk), 'posts1')
+            self.assertEqual(
+                sharding.shards_for([self.author.pk, self.other.pk]),
+                {'posts1', ['default', 'posts1'][self.other.pk % 2]})
+            self.assertEqual(
+                sharding.post_databases(sharding.SHARD_ID_STRIDE + 1),
+                ['posts1', 'default'])
+
+    @mock.patch.object(sharding, 'parallel', serial)
+    def test_pages_are_merged_across_shards(self):
+        now = timezone.now()
+        posts = []
+        for number in range(8):
+            post = Post.objects.create(
+                author=(self.author, self.other)[number % 3 == 0],
+                text=f'Merged {number}')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=number))
+            posts.append(post.pk)
+        merged = sharding.ShardedPosts(Post.objects.none(), [])
+        merged.querysets = [
+            Post.objects.filter(author=author).order_by('-pub_date', '-pk')
+            for author in (self.author, self.other)]
+        self.assertEqual(merged.count(), 8)
+        self.assertEqual([post.pk for post in merged[0:5]], posts[:5])
+        self.assertEqual([post.pk for post in merged[5:10]], posts[5:])
+
+    def test_pages_and_posts_work_when_enabled(self):
+        self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Sharded post', 'group': self.group.pk})
+        post = Post.objects.get(text='Sharded post')
+        self.assertEqual(post.pk % sharding.SHARD_ID_STRIDE, 0)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Sharded comment'})
+        self.assertTrue(post.comments.filter(text='Sharded comment').exists())
+
+        for url in (
+                reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': 'shards'}),
+                reverse('posts:profile', kwargs={'username': 'shardAuthor'}),
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})):
+            self.assertContains(self.client.get(url), 'Sharded post')
+
+
+def sharded(case):
+    """Runs the tests of ``case`` again with sharding turned on."""
+    return mock.patch.object(sharding, 'parallel', serial)(
+        override_settings(POST_SHARDS=['default'])(
+            type(f'Sharded{case.__name__}', (case,), {})))
+
+
+ShardedArchiveTests = sharded(test_archive.ArchiveTests)
+ShardedDigestTests = sharded(test_digests.DigestTests)
+ShardedFeedTests = sharded(test_feeds.FeedTests)
+ShardedFeedWatermarkTests = sharded(test_watermarks.FeedWatermarkTests)
+ShardedGroupStatsTests = sharded(test_group_stats.GroupStatsTests)
+ShardedSitemapTests = sharded(test_sitemaps.SitemapTests)
+ShardedTagTests = sharded(test_tags.TagTests)
+
+
+@override_settings(POST_SHARDS=['default', 'posts1'], MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch.object(sharding, 'parallel', serial)
+class TwoShardTests(TestCase):
+    databases = {'default', 'posts1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(username=f'twoShards{number}')
+            for number in range(2)]
+        cls.near, cls.far = sorted(users, key=lambda user: user.pk % 2)
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def profile(self, user):
+        return self.client.get(
+            reverse('posts:profile', kwargs={'username': user.username}))
+
+    def test_posts_are_created_in_the_shard_of_their_author(self):
+        self.assertEqual(sharding.shard_for(self.far.pk), 'posts1')
+        post = Post.objects.create(author=self.far, text='Far away')
+        self.assertEqual(post._state.db, 'posts1')
+        self.assertEqual(post.pk % sharding.SHARD_ID_STRIDE, 1)
+        self.assertFalse(Post.objects.using('default').filter(
+            pk=post.pk).exists())
+        self.assertContains(self.profile(self.far), 'Far away')
+        self.assertContains(
+            self.client.get(reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk})),
+            'Far away')
+
+        near = Post.objects.create(author=self.near, text='Close by')
+        self.assertEqual(near._state.db, 'default')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Far away')
+        self.assertContains(response, 'Close by')
+
+    def test_archive_and_restore_stay_in_the_shard(self):
+        post = Post.objects.create(author=self.far, text='Old and far')
+        list(archive_posts(timezone.now() + timedelta(days=1), 10))
+        self.assertTrue(ArchivedPost.objects.using('posts1').filter(
+            pk=post.pk).exists())
+        self.assertFalse(Post.objects.using('posts1').exists())
+        self.assertContains(self.profile(self.far), 'Old and far')
+
+        list(restore_posts(ArchivedPost.objects.all(), 10))
+        self.assertTrue(Post.objects.using('posts1').filter(
+            pk=post.pk).exists())
+        self.assertFalse(ArchivedPost.objects.using('posts1').exists())
+
+    def test_moving_an_author(self):
+        post = Post.objects.create(author=self.far, text='Moving house')
+        Comment.objects.using('posts1').create(
+            post=post, author=self.near, text='Bon voyage')
+        self.assertEqual(sharding.move_author(self.far.pk, 'default'), 1)
+        self.assertEqual(sharding.shard_for(self.far.pk), 'default')
+        self.assertFalse(Post.objects.using('posts1').exists())
+        self.assertTrue(Comment.objects.using('default').filter(
+            post_id=post.pk, text='Bon voyage').exists())
+        self.assertContains(self.profile(self.far), 'Moving house')
+
+    def test_admin_changelist_reads_every_shard(self):
+        admin = User.objects.create_superuser(
+            'shardAdmin', 'admin@example.com', 'password')
+        posts = [
+            Post.objects.create(author=author, text=f'Admin {number}')
+            for number, author in enumerate(
+                [self.near, self.far, self.near, self.far])]
+        self.client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        with mock.patch.object(PostAdmin, 'list_per_page', 3):
+            changelist = self.client.get(url).context['cl']
+            self.assertEqual(changelist.result_list, posts[:0:-1])
+            self.assertEqual(changelist.result_count, 4)
+            self.assertEqual(changelist.list_editable, ())
+            changelist = self.client.get(
+                url + changelist.next_page_url).context['cl']
+        self.assertEqual(changelist.result_list, posts[:1])
+        self.assertIsNone(changelist.next_cursor)
+
+    def test_collect_media_counts_the_images_of_every_shard(self):
+        post = Post.objects.create(
+            author=self.far, text='Pictured',
+            image=SimpleUploadedFile('far.gif', SMALL_GIF, 'image/gif'))
+        self.assertEqual(post._state.db, 'posts1')
+        output = StringIO()
+        call_command('collect_media', grace=0, stdout=output)
+        self.assertNotIn('orphan: ', output.getvalue())
+        self.assertTrue(post.image.storage.exists(post.image.name))
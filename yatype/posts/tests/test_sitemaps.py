@@ -0,0 +1,85 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Group, Post
+from ..sitemaps import SECTIONS, build_sitemaps
+
+User = get_user_model()
+SITEMAP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    SITEMAP_ROOT=SITEMAP_ROOT, SITEMAP_SHARD_SIZE=2, SITEMAP_CHUNK_SIZE=1,
+    SITE_URL='http://testserver')
+class SitemapTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='mapAuthor')
+        cls.group = Group.objects.create(
+            title='Map group', slug='map', description='Map')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Post {number}')
+            for number in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    def read(self, name):
+        with gzip.open(os.path.join(SITEMAP_ROOT, name), 'rt') as shard:
+            return shard.read()
+
+    def test_post_signatures_read_only_an_index(self):
+        for section in SECTIONS[:2]:
+            with CaptureQueriesContext(connection) as queries:
+                section.signature(0, 100)
+            with connection.cursor() as cursor:
+                for query in queries:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                    with self.subTest(section=section.name):
+                        self.assertIn('COVERING INDEX', plan)
+
+    def test_shards_and_index(self):
+        written, unchanged, removed = build_sitemaps()
+        first = min(post.pk for post in self.posts) // 2
+        self.assertIn(f'sitemap-posts-{first}.xml.gz', written)
+        self.assertEqual(unchanged, [])
+        urls = ''.join(self.read(name) for name in written)
+        for post in self.posts:
+            self.assertIn(
+                f'<loc>http://testserver/posts/{post.pk}/</loc>', urls)
+        self.assertIn('<loc>http://testserver/profile/mapAuthor/</loc>', urls)
+        self.assertIn('<loc>http://testserver/group/map/</loc>', urls)
+        self.assertIn(
+            f'<lastmod>{self.posts[-1].pub_date.isoformat()}</lastmod>', urls)
+
+        response = Client().get('/sitemap.xml')
+        content = b''.join(response.streaming_content).decode()
+        for name in written:
+            self.assertIn(f'<loc>http://testserver/{name}</loc>', content)
+        response = Client().get(f'/{written[0]}')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+
+    def test_only_changed_shards_are_rewritten(self):
+        build_sitemaps()
+        post = self.posts[-1]
+        post.text = 'Edited'
+        post.save()
+        written, unchanged, removed = build_sitemaps()
+        self.assertEqual(written, [f'sitemap-posts-{post.pk // 2}.xml.gz'])
+        self.assertTrue(unchanged)
+
+        Post.objects.filter(pk__in=[post.pk for post in self.posts]).delete()
+        written, unchanged, removed = build_sitemaps()
+        self.assertIn(f'sitemap-posts-{post.pk // 2}.xml.gz', removed)
+        self.assertFalse(os.path.exists(os.path.join(
+            SITEMAP_ROOT, f'sitemap-posts-{post.pk // 2}.xml.gz')))
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reposter')
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text=name,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'))
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.create_post('meme.gif')
+        second = self.create_post('meme_copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+
+    def test_reused_file_gets_a_fresh_mtime(self):
+        first = self.create_post('old.gif')
+        path = first.image.path
+        os.utime(path, (0, 0))
+        self.create_post('old_again.gif')
+        self.assertGreater(os.path.getmtime(path), time.time() - 60)
+
+    def test_collect_media_keeps_referenced_files(self):
+        post = self.create_post('kept.gif')
+        name = post.image.name
+        output = StringIO()
+
+        call_command('collect_media', grace=0, stdout=output)
+        self.assertTrue(post.image.storage.exists(name))
+
+        post.delete()
+        call_command('collect_media', grace=0, stdout=output)
+        self.assertFalse(post.image.storage.exists(name))
+        self.assertIn(f'orphan: {name}', output.getvalue())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts, restore_posts
+from ..models import ArchivedPost, Mention, Post, PostTag
+from ..rendering import parse
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='tagAuthor')
+        cls.reader = User.objects.create_user(username='tag.reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_parse(self):
+        self.assertEqual(
+            parse('#Django and #python, @tag.reader. mail a@b.c, '
+                  'see /page#anchor &#39; #django'),
+            ({'django', 'python'}, {'tag.reader'}))
+
+    def test_saving_indexes_tags_and_mentions(self):
+        post = Post.objects.create(
+            author=self.author, text='#Django hi @tag.reader @nobody')
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['django'])
+        self.assertEqual(Mention.objects.get().user, self.reader)
+        self.assertEqual(Mention.objects.get().pub_date, post.pub_date)
+
+        post.text = '#python only'
+        post.save()
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['python'])
+        self.assertFalse(Mention.objects.exists())
+
+    def test_tag_feed_pages_with_a_cursor(self):
+        posts = [
+            Post.objects.create(author=self.author, text=f'#feed post {i}')
+            for i in range(7)]
+        url = reverse('posts:tag_posts', kwargs={'name': 'FEED'})
+        response = self.client.get(url)
+        self.assertEqual(response.context['posts'], posts[:1:-1])
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']})
+        self.assertEqual(response.context['posts'], posts[1::-1])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            self.client.get(url, {'cursor': 'bad'}).status_code, 404)
+
+    def test_mentions_inbox(self):
+        Post.objects.create(author=self.author, text='Hello @tag.reader')
+        Post.objects.create(author=self.author, text='Hello nobody')
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(
+            [post.text for post in response.context['posts']],
+            ['Hello @tag.reader'])
+        response = Client().get(reverse('posts:mentions'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_backfill_and_archive(self):
+        post = Post.objects.create(author=self.author, text='#old @tag.reader')
+        PostTag.objects.all().delete()
+        Mention.objects.all().delete()
+        call_command('backfill_tags', batch_size=1, stdout=StringIO())
+        self.assertTrue(post.post_tags.exists())
+        self.assertTrue(post.mentions.exists())
+
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000))
+        list(archive_posts(timezone.now() - timedelta(days=365), 10))
+        self.assertFalse(PostTag.objects.exists())
+        list(restore_posts(ArchivedPost.objects.all(), 10))
+        self.assertTrue(post.post_tags.exists())
+        self.assertTrue(post.mentions.exists())
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedPost, Post
+from ..view_counts import view_buffer
+
+User = get_user_model()
+
+
+class ViewCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Views left by other tests, before their post ids are reused.
+        view_buffer.flush()
+        cls.author = User.objects.create_user(username='viewAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Viewed')
+        cls.url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        view_buffer.flush()
+
+    def test_views_are_buffered_and_flushed_in_one_batch(self):
+        other = Post.objects.create(author=self.author, text='Other')
+        for _ in range(3):
+            response = Client().get(self.url)
+        self.assertEqual(response.context['views'], 3)
+        Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': other.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+
+        with self.assertNumQueries(4):
+            self.assertEqual(view_buffer.flush(), 2)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.views, other.views), (3, 1))
+        self.assertEqual(Client().get(self.url).context['views'], 4)
+
+    def test_archived_posts_keep_counting(self):
+        Client().get(self.url)
+        view_buffer.flush()
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000))
+        list(archive_posts(timezone.now() - timedelta(days=365), 10))
+        Client().get(self.url)
+        view_buffer.flush()
+        self.assertEqual(ArchivedPost.objects.get().views, 2)
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -10,6 +11,7 @@ from django.urls import reverse
 
 from ..forms import PostForm
 from ..models import Group, Post
+from ..templatetags.post_cards import card_key
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -133,7 +135,8 @@ class ContextViewsTests(BaseSetupClass):
         self.assertIn('comments', response.context)
         self.assertEqual(created_post, response.context['post'])
         self.assertContains(response, 'post', 7)
-        self.assertContains(response, 'image', 3)
+        # favicon links plus the WebP <source> of the post image
+        self.assertContains(response, 'image', 4)
         self.assertEqual(
             str('Test comment'),
             str(response.context['comments'][0].text))
@@ -238,6 +241,16 @@ class TemplateViewsTests(BaseSetupClass):
                 print(f'Run case for reverse_name {reverse_name}')
                 self.assertTemplateUsed(response, template)
 
+    def test_current_page_is_active_in_the_header(self):
+        for name in ('posts:group_index', 'posts:post_create',
+                     'posts:mentions', 'posts:digest_settings'):
+            with self.subTest(name=name):
+                url = reverse(name)
+                response = self.authorized_client.get(url)
+                self.assertRegex(
+                    response.content.decode(),
+                    rf'active\s*"\s*href="{url}"')
+
     def test_error_page(self):
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
@@ -246,16 +259,43 @@ class TemplateViewsTests(BaseSetupClass):
 class PostsViewsCache(BaseSetupClass):
 
     def test_cache_index(self):
-        response = self.authorized_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
         posts = response.content
         Post.objects.create(
             text='Cash post',
             author=self.user,
         )
-        response_old = self.authorized_client.get(reverse('posts:index'))
+        response_old = self.guest_client.get(reverse('posts:index'))
         before_clean_cache = response_old.content
         self.assertEqual(before_clean_cache, posts)
+        # Signed-in users get their own reactions, so never a cached copy.
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Cash post')
         cache.clear()
-        after_clean_cache = self.authorized_client.get(reverse('posts:index'))
+        after_clean_cache = self.guest_client.get(reverse('posts:index'))
         new_posts = after_clean_cache.content
         self.assertNotEqual(before_clean_cache, new_posts)
+
+    def test_post_cards_are_read_with_one_cache_query(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        post = Post.objects.filter(author=self.user).first()
+        self.assertIsNotNone(cache.get(card_key(post, False, True)))
+        with mock.patch.object(
+                cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'set_many') as set_many:
+            self.authorized_client.get(url)
+        get_many.assert_called_once()
+        set_many.assert_not_called()
+
+    def test_post_card_fragment_cache(self):
+        post = Post.objects.filter(author=self.user).first()
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        Post.objects.filter(pk=post.pk).update(text='Changed quietly')
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'Changed quietly')
+        post.text = 'Changed with save'
+        post.save()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Changed with save')
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, Follow, FeedWatermark
+from ..watermarks import _write_watermarks, watermark_buffer
+
+User = get_user_model()
+
+
+class FeedWatermarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Post {x}') for x in range(3))
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def tearDown(self):
+        watermark_buffer.flush()
+
+    def get_unread(self):
+        return self.client.get(reverse('posts:follow_unread')).json()
+
+    def test_unread_count_for_new_reader(self):
+        self.assertEqual(self.get_unread(), {'unread': 3, 'capped': False})
+
+    def test_feed_visit_resets_unread(self):
+        self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(self.get_unread()['unread'], 0)
+
+        Post.objects.create(author=self.author, text='Fresh post')
+        cache.clear()
+        self.assertEqual(self.get_unread()['unread'], 1)
+
+    def test_watermarks_are_written_in_batch(self):
+        self.client.get(reverse('posts:follow_index'))
+        self.assertFalse(FeedWatermark.objects.exists())
+
+        watermark_buffer.flush()
+        watermark = FeedWatermark.objects.get(user=self.reader)
+        self.assertEqual(
+            watermark.last_seen_post_id,
+            Post.objects.latest('pk').pk)
+
+    def test_stale_flush_does_not_move_watermark_back(self):
+        now = timezone.now()
+        _write_watermarks({self.reader.pk: (20, now)})
+        _write_watermarks({self.reader.pk: (10, now - timedelta(hours=1))})
+        watermark = FeedWatermark.objects.get(user=self.reader)
+        self.assertEqual(watermark.last_seen_post_id, 20)
+        self.assertEqual(watermark.last_seen, now)
+
+        _write_watermarks({self.reader.pk: (30, now + timedelta(hours=1))})
+        watermark.refresh_from_db()
+        self.assertEqual(watermark.last_seen_post_id, 30)
+        self.assertEqual(watermark.last_seen, now + timedelta(hours=1))
+
+    @override_settings(FEED_UNREAD_CAP=2)
+    def test_unread_count_is_capped(self):
+        self.assertEqual(self.get_unread(), {'unread': 2, 'capped': True})
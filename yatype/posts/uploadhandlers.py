@@ -0,0 +1,35 @@
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler, TemporaryFileUploadHandler)
+
+
+class HashingUploadMixin:
+    """Hashes each chunk as it streams in, so the storage can name the file
+    without reading it back."""
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        if remaining is None:
+            self.hasher.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.content_hash = self.hasher.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(
+        HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(
+        HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
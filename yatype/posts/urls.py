@@ -1,24 +1,56 @@
 from django.urls import path
 
+from core.ratelimit import ratelimit
 from . import views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
+    path('mentions/', views.mentions, name='mentions'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
-    path('create/', views.post_create, name='post_create'),
+    path(
+        'create/',
+        ratelimit('10/m')(views.post_create),
+        name='post_create'),
     path(
         'posts/<int:post_id>/comment/',
-        views.add_comment,
+        ratelimit('20/m')(views.add_comment),
         name='add_comment'),
+    path(
+        'posts/<int:post_id>/react/<str:kind>/',
+        ratelimit('30/m')(views.react),
+        name='react'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/unread/', views.follow_unread, name='follow_unread'),
+    path('stream/', views.post_stream, name='post_stream'),
+    path(
+        'stream/group/<slug:slug>/',
+        views.post_stream,
+        name='group_stream'),
+    path('stream/follow/', views.follow_stream, name='follow_stream'),
+    path('feeds/<str:fmt>/', views.site_feed, name='site_feed'),
+    path(
+        'feeds/group/<slug:slug>/<str:fmt>/',
+        views.group_feed,
+        name='group_feed'),
+    path(
+        'feeds/profile/<str:username>/<str:fmt>/',
+        views.author_feed,
+        name='author_feed'),
+    path('digest/settings/', views.digest_settings, name='digest_settings'),
+    path(
+        'digest/unsubscribe/<str:token>/',
+        views.digest_unsubscribe,
+        name='digest_unsubscribe'),
     path(
         'profile/<str:username>/follow/',
-        views.profile_follow,
+        ratelimit('30/m', methods=('GET', 'POST'))(views.profile_follow),
         name='profile_follow'
     ),
     path(
@@ -1,7 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .sharding import first_rows
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 def get_page_obj(request, post_list):
     paginator = Paginator(post_list, 5)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+class ChainedPosts:
+    """Several querysets paginated as one list: all rows of the first, then
+    all rows of the next, so a page at the boundary reads from both."""
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    @cached_property
+    def counts(self):
+        # Never taken from a cache: a count short of the rows leaves the
+        # newest of the next queryset out of the pages.
+        return [queryset.count() for queryset in self.querysets]
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        rows = []
+        for queryset, count in zip(self.querysets, self.counts):
+            if stop <= 0:
+                break
+            if start < count:
+                rows += queryset[start:min(stop, count)]
+            start, stop = max(start - count, 0), stop - count
+        return rows
+
+
+def encode_cursor(pub_date, post_id):
+    delta = pub_date - EPOCH
+    micros = delta // timedelta(microseconds=1)
+    return f'{micros}-{post_id}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, post_id = map(int, cursor.split('-'))
+    except ValueError:
+        raise Http404('Invalid cursor.')
+    return EPOCH + timedelta(microseconds=micros), post_id
+
+
+def get_cursor_page(request, rows, per_page=5):
+    """Keyset pagination of ``rows`` (tag or mention rows with ``pub_date``
+    and ``post``) by ``?cursor=``, newest first. Returns the posts of the
+    page and the cursor of the next one, if any. The rows of every shard
+    are merged."""
+    rows = rows.select_related(
+        'post__author', 'post__group').order_by('-pub_date', '-post_id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        pub_date, post_id = decode_cursor(cursor)
+        rows = rows.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id))
+    rows = first_rows(
+        rows, per_page + 1, key=lambda row: (row.pub_date, row.post_id))
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1].pub_date, rows[-1].post_id)
+    return [row.post for row in rows], next_cursor
@@ -0,0 +1,46 @@
+import atexit
+import operator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from core import metrics
+from core.buffers import WriteBuffer
+from .models import ArchivedPost, Post
+from .sharding import databases
+
+
+def _write_views(items):
+    # One UPDATE per table and shard for the whole batch; archived posts
+    # keep their ids, so every id matches a row in at most one of them.
+    increments = Case(
+        *(When(pk=post_id, then=Value(count))
+          for post_id, count in items.items()),
+        output_field=IntegerField())
+    for database in databases():
+        with transaction.atomic(using=database):
+            for model in (Post, ArchivedPost):
+                model.objects.using(database).filter(pk__in=items).update(
+                    views=F('views') + increments)
+    metrics.incr('posts.views_flushed', sum(items.values()))
+
+
+# Views of the last ``POST_VIEWS_FLUSH_INTERVAL`` seconds live only in the
+# memory of the worker and are lost if it crashes.
+view_buffer = WriteBuffer(
+    _write_views,
+    merge=operator.add,
+    max_size=settings.POST_VIEWS_FLUSH_SIZE,
+    interval=settings.POST_VIEWS_FLUSH_INTERVAL,
+)
+atexit.register(view_buffer.flush)
+
+
+def record_view(post_id):
+    view_buffer.add(post_id, 1)
+
+
+def view_count(post):
+    """Stored views plus the ones this worker has not flushed yet."""
+    return post.views + view_buffer.get(post.pk, 0)
@@ -1,56 +1,143 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import connections
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse)
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.utils.http import is_safe_url
 
-from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
-from .utils import get_page_obj
+from core.middleware import anonymous_cache_page, compress_page
+from .archive import get_post
+from .digests import user_id_from_token
+from .events import stream_events
+from .feeds import serve_feed
+from .forms import PostForm, CommentForm, DigestSubscriptionForm
+from .models import (
+    ArchivedPost, Post, Group, GroupStats, User, Follow, DigestSubscription,
+    Mention, PostTag, Reaction, Tag)
+from .profiles import get_header, is_following
+from .reactions import annotate_reactions, set_reaction
+from .sharding import (
+    author_posts, find_first, find_post, followed_posts, gather)
+from .utils import ChainedPosts, get_cursor_page, get_page_obj
+from .view_counts import record_view, view_count
+from .watermarks import get_unread_count, mark_seen
 
 
-@cache_page(timeout=20, key_prefix='index_page')
+def _post_page(request, post_list):
+    page_obj = get_page_obj(request, post_list)
+    page_obj.object_list = annotate_reactions(
+        page_obj.object_list, request.user)
+    return page_obj
+
+
+def _hot_post_or_404(post_id):
+    try:
+        return find_post(Post, post_id)
+    except Post.DoesNotExist:
+        raise Http404('No post matches the given query.')
+
+
+@anonymous_cache_page(settings.INDEX_CACHE_TIMEOUT, key_prefix='index_page')
+@compress_page
 def index(request):
-    post_list = Post.objects.select_related("group", "author")
+    post_list = gather(Post.objects.select_related("group", "author"))
     text = "Last updates"
     context = {
         'text': text,
-        'page_obj': get_page_obj(request, post_list)
+        'page_obj': _post_page(request, post_list)
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    post_list = gather(group.posts.select_related('author'))
     context = {
         'group': group,
-        'page_obj': get_page_obj(request, post_list)
+        'page_obj': _post_page(request, post_list)
     }
     return render(request, 'posts/group_list.html', context)
 
 
+GROUP_ORDERINGS = {
+    'activity': '-last_activity',
+    'posts': '-post_count',
+    'trending': '-posts_24h',
+}
+
+
+def group_index(request):
+    sort = request.GET.get('sort')
+    if sort not in GROUP_ORDERINGS:
+        sort = 'activity'
+    stats = GroupStats.objects.select_related('group').order_by(
+        GROUP_ORDERINGS[sort], '-group')
+    context = {
+        'sort': sort,
+        'page_obj': get_page_obj(request, stats),
+        'page_query': f'sort={sort}&',
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related("group", "author")
-    following = Follow.objects.filter(
-        user_id=request.user.id,
-        author_id=author.pk).exists()
+    header, version = get_header(username)
+    author = header['author']
+    # Archived posts are all older than the hot ones, so they follow them.
+    post_list = ChainedPosts(
+        author_posts(Post.objects, author.pk).filter(
+            author=author).select_related("group", "author"),
+        author_posts(ArchivedPost.objects, author.pk).filter(
+            author=author).select_related("group", "author"),
+    )
     context = {
-        'author': author,
-        'posts_count': post_list.count(),
-        'page_obj': get_page_obj(request, post_list),
-        'following': following
+        **header,
+        'page_obj': _post_page(request, post_list),
+        'following': is_following(request.user, author.pk, version),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def tag_posts(request, name):
+    # Every shard has its own tags table.
+    tag = find_first(Tag.objects.filter(name=name.lower()))
+    if tag is None:
+        raise Http404('No tag matches the given query.')
+    posts, next_cursor = get_cursor_page(
+        request, PostTag.objects.filter(tag__name=tag.name))
+    annotate_reactions(posts, request.user)
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/tag.html', context)
+
+
+@login_required
+def mentions(request):
+    posts, next_cursor = get_cursor_page(
+        request, Mention.objects.filter(user=request.user))
+    annotate_reactions(posts, request.user)
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/mentions.html', context)
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = Comment.objects.filter(
-        post_id=post_id)
+    post, comments, archived = get_post(post_id)
+    record_view(post.pk)
 
     context = {
         'post': post,
-        'can_edit': request.user == post.author,
+        'views': view_count(post),
+        'archived': archived,
+        'can_edit': not archived and request.user == post.author,
         'comments': comments,
         'form': CommentForm()
     }
@@ -71,7 +158,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = _hot_post_or_404(post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post.pk)
     form = PostForm(
@@ -87,7 +174,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = _hot_post_or_404(post_id)
 
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -98,15 +185,42 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@require_POST
+def react(request, post_id, kind):
+    if kind not in dict(Reaction.KIND_CHOICES):
+        raise Http404('Unknown reaction.')
+    post, _, _ = get_post(post_id)
+    active = request.POST.get('state', 'on') == 'on'
+    count = set_reaction(request.user, post.pk, kind, active)
+    if request.is_ajax():
+        return JsonResponse({'kind': kind, 'count': count, 'active': active})
+    next_url = request.POST.get('next')
+    if not is_safe_url(next_url, allowed_hosts={request.get_host()},
+                       require_https=request.is_secure()):
+        next_url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+    return redirect(next_url)
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = followed_posts(request.user)
+    page_obj = _post_page(request, post_list)
+    if page_obj.number == 1 and page_obj.object_list:
+        mark_seen(request.user, max(post.pk for post in page_obj))
     context = {
-        'page_obj': get_page_obj(request, post_list),
+        'page_obj': page_obj,
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def follow_unread(request):
+    count = get_unread_count(request.user)
+    cap = settings.FEED_UNREAD_CAP
+    return JsonResponse({'unread': min(count, cap), 'capped': count > cap})
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -119,9 +233,9 @@ def profile_follow(request, username):
             author=author,
             user=request.user
         )
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = followed_posts(request.user)
     context = {
-        'page_obj': get_page_obj(request, post_list),
+        'page_obj': _post_page(request, post_list),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -135,3 +249,77 @@ def profile_unfollow(request, username):
 
     unfollow.delete()
     return redirect('posts:profile', username=author)
+
+
+def _event_stream(matcher):
+    # The stream stays open up to EVENTS_STREAM_LIFETIME seconds without
+    # touching the database: give the connections of this thread back to
+    # the pool before it starts waiting.
+    connections.close_all()
+    yield from stream_events(matcher)
+
+
+def _event_stream_response(matcher):
+    if not settings.LIVE_UPDATES:
+        # 204 tells EventSource in pages opened before the switch to stop
+        # reconnecting.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        _event_stream(matcher), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def post_stream(request, slug=None):
+    if slug is None:
+        return _event_stream_response(lambda event: True)
+    group = get_object_or_404(Group, slug=slug)
+    return _event_stream_response(
+        lambda event: event['group_id'] == group.pk)
+
+
+@login_required
+def follow_stream(request):
+    authors = set(Follow.objects.filter(
+        user=request.user).values_list('author_id', flat=True))
+    return _event_stream_response(
+        lambda event: event['author_id'] in authors)
+
+
+@login_required
+def digest_settings(request):
+    subscription = DigestSubscription.objects.filter(
+        user=request.user).first() or DigestSubscription(
+        user=request.user, frequency=settings.DIGEST_DEFAULT_FREQUENCY)
+    form = DigestSubscriptionForm(request.POST or None, instance=subscription)
+    if form.is_valid():
+        form.save()
+        return redirect('posts:digest_settings')
+    return render(request, 'posts/digest_settings.html', {'form': form})
+
+
+def digest_unsubscribe(request, token):
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise Http404('Invalid unsubscribe link.')
+    unsubscribed = request.method == 'POST'
+    if unsubscribed:
+        DigestSubscription.objects.update_or_create(
+            user_id=user_id,
+            defaults={'frequency': DigestSubscription.OFF})
+    return render(
+        request, 'posts/digest_unsubscribe.html',
+        {'unsubscribed': unsubscribed})
+
+
+def site_feed(request, fmt):
+    return serve_feed(request, 'site', fmt)
+
+
+def group_feed(request, slug, fmt):
+    return serve_feed(request, 'group', fmt, slug)
+
+
+def author_feed(request, username, fmt):
+    return serve_feed(request, 'author', fmt, username)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.buffers import WriteBuffer
+from .models import FeedWatermark, Follow, Post
+from .sharding import enabled, shards_for
+
+UNREAD_CACHE_KEY = 'feed_unread:{}'
+
+
+def _write_watermarks(items):
+    watermarks = [
+        FeedWatermark(user_id=user_id, last_seen_post_id=post_id,
+                      last_seen=seen)
+        for user_id, (post_id, seen) in items.items()
+    ]
+    with transaction.atomic():
+        FeedWatermark.objects.bulk_create(watermarks, ignore_conflicts=True)
+        # Another worker may have flushed a later visit in the meantime:
+        # watermarks only move forward.
+        for watermark in watermarks:
+            for field in ('last_seen_post_id', 'last_seen'):
+                setattr(watermark, field, Greatest(F(field), Value(
+                    getattr(watermark, field),
+                    output_field=FeedWatermark._meta.get_field(field))))
+        FeedWatermark.objects.bulk_update(
+            watermarks, ['last_seen_post_id', 'last_seen'])
+
+
+watermark_buffer = WriteBuffer(
+    _write_watermarks,
+    merge=max,
+    max_size=settings.FEED_WATERMARK_FLUSH_SIZE,
+    interval=settings.FEED_WATERMARK_FLUSH_INTERVAL,
+)
+
+
+def mark_seen(user, post_id):
+    watermark_buffer.add(user.pk, (post_id, timezone.now()))
+    cache.delete(UNREAD_CACHE_KEY.format(user.pk))
+
+
+def get_last_seen_post_id(user):
+    pending = watermark_buffer.get(user.pk)
+    if pending is not None:
+        return pending[0]
+    return FeedWatermark.objects.filter(user_id=user.pk).values_list(
+        'last_seen_post_id', flat=True).first() or 0
+
+
+def get_unread_count(user):
+    key = UNREAD_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        cap = settings.FEED_UNREAD_CAP
+        # Post ids grow with pub_date and the (author, pub_date) index
+        # carries the rowid, so this count never touches the post rows.
+        posts = Post.objects.filter(pk__gt=get_last_seen_post_id(user))
+        if not enabled():
+            count = posts.filter(
+                author__following__user=user).values('pk')[:cap + 1].count()
+        else:
+            # The follows are in the default database only.
+            author_ids = list(Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True))
+            posts = posts.filter(author_id__in=author_ids).values('pk')
+            count = min(cap + 1, sum(
+                posts.using(database)[:cap + 1].count()
+                for database in shards_for(author_ids)))
+        cache.set(key, count, settings.FEED_UNREAD_CACHE_TIMEOUT)
+    return count
@@ -3,6 +3,7 @@ from django.contrib.auth.views import LogoutView, LoginView,\
     PasswordResetDoneView, PasswordResetConfirmView, PasswordResetCompleteView
 from django.urls import path
 
+from core.ratelimit import ratelimit
 from . import views
 
 app_name = 'users'
@@ -19,8 +20,8 @@ urlpatterns = [
     path('password_change/done/', PasswordChangeDoneView.as_view(
         template_name='users/password_change_done.html'),
         name='password_change_done'),
-    path('password_reset/', PasswordResetView.as_view(
-        template_name='users/password_reset_form.html'),
+    path('password_reset/', ratelimit('5/h')(PasswordResetView.as_view(
+        template_name='users/password_reset_form.html')),
         name='password_reset'),
     path('password_reset/done/', PasswordResetDoneView.as_view(
         template_name='users/password_reset_done.html'),
@@ -31,5 +32,8 @@ urlpatterns = [
     path('reset/done', PasswordResetCompleteView.as_view(
         template_name='users/password_reset_complete.html'),
         name='password_reset_complete'),
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path(
+        'signup/',
+        ratelimit('5/h')(views.SignUp.as_view()),
+        name='signup'),
 ]
@@ -54,7 +54,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +74,8 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
+        # Without explicit loaders Django compiles each template once per
+        # process with DEBUG off and rereads them on every render with it on.
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -79,6 +84,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.live_updates.live_updates',
             ],
         },
     },
@@ -89,13 +95,30 @@ WSGI_APPLICATION = 'yatype.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# The pooled SQLite backend keeps up to POOL['MAX_SIZE'] connections open
+# between requests instead of reconnecting on every one; see
+# core/db/backends/sqlite3_pool/base.py for the options and
+# `manage.py bench_db_pool` to compare it with the plain backend.
+# A request thread holds its connection until the request finishes, so the
+# pool has one per thread of the WSGI server (SERVER_THREADS, e.g. gunicorn
+# --threads) plus one per thread querying the post shards.
+SERVER_THREADS = 8
+POST_SHARD_WORKERS = 4
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3_pool',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'POOL': {
+            'MAX_SIZE': SERVER_THREADS + POST_SHARD_WORKERS,
+            'TIMEOUT': 10,
+            'MAX_LIFETIME': 600,
+            'HEALTH_CHECK': True,
+        },
     }
 }
 
+DATABASE_ROUTERS = ['posts.sharding.PostShardRouter']
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -138,12 +161,170 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Hashed names and prebuilt .br/.gz files need `manage.py collectstatic`,
+# so development keeps the plain storage.
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+    else 'core.storage.CompressedManifestStaticFilesStorage')
+STATIC_CACHE_MAX_AGE = 365 * 24 * 3600
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media files are content-addressed and never change once written.
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Let the front web server send file bodies: None, 'X-Sendfile' or
+# 'X-Accel-Redirect' (nginx, with an internal location under the prefix).
+FILE_OFFLOAD_HEADER = None
+FILE_OFFLOAD_PREFIX = '/internal'
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Room for the post cards of many pages: past the limit a third of
+        # the entries, pages included, is dropped at once.
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
+
+# "New since your last visit" counters for the follow feed
+FEED_UNREAD_CAP = 99
+FEED_UNREAD_CACHE_TIMEOUT = 15
+FEED_WATERMARK_FLUSH_SIZE = 50
+FEED_WATERMARK_FLUSH_INTERVAL = 30
+
+# Post views are counted in each worker's memory and written in one batch
+# every interval or once this many posts have pending views.
+POST_VIEWS_FLUSH_SIZE = 500
+POST_VIEWS_FLUSH_INTERVAL = 10
+
+# Live post notifications (Server-Sent Events). Off by default: every open
+# index, group or follow page holds a server thread for up to
+# EVENTS_STREAM_LIFETIME seconds, so only turn it on with an async (gevent)
+# worker or far more threads than SERVER_THREADS.
+LIVE_UPDATES = False
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY = 5
+EVENTS_STREAM_LIFETIME = 300
+# Without a log file a stream only hears of the posts created by its own
+# worker process. Set it to a file path when running several workers.
+EVENTS_LOG_PATH = None
+EVENTS_LOG_POLL_INTERVAL = 1
+EVENTS_LOG_RETENTION = 1000
+
+# Write endpoints: per-view rates are declared in the url patterns
+RATELIMIT_MAX_CONCURRENT_WRITES = 4
+RATELIMIT_SHED_RETRY_AFTER = 5
+
+# Uploaded post images
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_SIDE = 2048
+IMAGE_QUALITY = 85
+IMAGE_VARIANT_WIDTHS = (480, 960)
+IMAGE_VARIANT_FORMATS = ('AVIF', 'WEBP')
+IMAGE_VARIANTS_DIR = 'variants/'
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploadhandlers.HashingMemoryFileUploadHandler',
+    'posts.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
+# Dynamic compression of text responses
+COMPRESSION_MIN_SIZE = 200
+
+# Seconds the first page of the index is cached for
+INDEX_CACHE_TIMEOUT = 20
+# Seconds a rendered post card is cached for; an edit changes its key
+POST_CARD_CACHE_TIMEOUT = 3600
+
+# Cache warmup on worker start (yatype/wsgi.py) and `manage.py warm_cache`.
+# Pages are requested under the host of SITE_URL, the one visitors send,
+# since cached pages are keyed on it. Pages whose cache and post cards both
+# expire within WARMUP_MIN_CACHE_TIMEOUT seconds would be gone before the
+# worker takes traffic and are not warmed.
+WARMUP_ON_BOOT = not DEBUG
+WARMUP_MIN_CACHE_TIMEOUT = 60
+WARMUP_ACCEPT_ENCODINGS = ['gzip, deflate, br', 'gzip, deflate', '']
+WARMUP_INDEX_PAGES = 5
+WARMUP_GROUPS = 5
+WARMUP_PROFILES = 5
+WARMUP_RECENT_POSTS = 500
+
+# Request profiling: requests with a signed token (`manage.py profile_report
+# --token`) and a random share of all requests are profiled, either with a
+# stack sampler ('sampler', collapsed stacks) or cProfile ('cprofile').
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MODE = 'sampler'
+PROFILING_SAMPLE_RATE = 0
+PROFILING_SAMPLE_INTERVAL = 0.005
+PROFILING_KEEP = 20
+PROFILING_TOKEN_MAX_AGE = 24 * 3600
+
+# Slow query log (JSON lines, `manage.py slow_query_report`); a threshold of
+# None turns the tracing off.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.jsonl')
+SLOW_QUERY_STACK_DEPTH = 5
+
+# Admin changelists of large tables count filtered results only up to this
+ADMIN_COUNT_LIMIT = 10000
+
+# Cold storage of old posts (`manage.py archive_posts` / `restore_posts`)
+ARCHIVE_AFTER_DAYS = 2 * 365
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_BATCH_PAUSE = 0.1
+
+# Digest emails of new posts from followed authors (`manage.py send_digests`,
+# run it at least hourly)
+SITE_URL = 'http://localhost:8000'
+DIGEST_DEFAULT_FREQUENCY = 'daily'
+DIGEST_BATCH_SIZE = 100
+# Newest posts listed in a digest; the subject counts them all
+DIGEST_MAX_POSTS = 20
+
+# RSS/Atom feeds, kept in the cache until a post in them changes. The
+# invalidation only reaches the cache of the process that saved the post (the
+# LocMemCache is per process), so the timeout bounds how stale the other
+# workers' copies get; it can be raised with a cache shared by all processes.
+FEEDS_ITEMS = 20
+FEEDS_CACHE_TIMEOUT = 60
+FEEDS_MAX_AGE = 300
+
+# Sitemaps, written by `manage.py build_sitemaps` (run it from cron) in shards
+# of primary key ranges; only shards whose rows changed are rewritten.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_CHUNK_SIZE = 2000
+SITEMAP_MAX_AGE = 3600
+
+# Hashtags and mentions of posts saved before they were parsed are indexed by
+# `manage.py backfill_tags`.
+TAGS_BACKFILL_BATCH_SIZE = 500
+
+# Post bodies are rendered to HTML on save; `manage.py rerender_posts` catches
+# up after the rendering rules (posts.rendering.RENDER_VERSION) change.
+RERENDER_BATCH_SIZE = 500
+
+# Groups directory; `manage.py refresh_group_stats` should run every few
+# minutes to age posts out of the 24-hour counts.
+ACTIVE_GROUPS_COUNT = 5
+
+# Reaction counts are split over this many rows per post and kind, so that
+# the reactions to a popular post do not all update the same row.
+REACTION_COUNTER_SHARDS = 8
+
+# Profile headers (post and follower counts) are cached per author until one
+# of their posts or follows changes. As with the feeds, the invalidation only
+# reaches the cache of the process that made the change, so the timeout
+# bounds how long the other workers show stale counts.
+AUTHOR_HEADER_TIMEOUT = 60
+
+# Posts can be split by author over several databases: list their aliases
+# (each also in DATABASES, 'default' included if it keeps posts) to turn it
+# on, and move authors between them with `manage.py rebalance_shards`.
+# Queries spanning shards run on up to POST_SHARD_WORKERS threads, set
+# with the database pool above; give every shard a POOL of the same size.
+POST_SHARDS = []
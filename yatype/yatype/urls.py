@@ -14,9 +14,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from core.media import serve_media, serve_sitemap, serve_static
+from core.views import metrics_snapshot
 
 urlpatterns = [
     path('auth/', include('users.urls')),
@@ -24,13 +26,18 @@ urlpatterns = [
     path('', include('posts.urls', namespace='yatype_app')),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics/', metrics_snapshot, name='metrics'),
+    # Sitemaps may only list URLs below their own location.
+    path('sitemap.xml', serve_sitemap, name='sitemap'),
+    re_path(r'^(?P<name>sitemap-[a-z]+-\d+\.xml\.gz)$', serve_sitemap,
+            name='sitemap_shard'),
 ]
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.internal_server_error'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+urlpatterns += [
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', serve_media),
+    path(f'{settings.STATIC_URL.lstrip("/")}<path:path>', serve_static),
+]
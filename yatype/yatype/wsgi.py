@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatype.settings')
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ON_BOOT:
+    from core.warmup import warm_up
+
+    warm_up()